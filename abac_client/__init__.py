@@ -0,0 +1,3 @@
+from abac_client.client import AuthorizationClient, AuthorizationError, DecisionCache
+
+__all__ = ["AuthorizationClient", "AuthorizationError", "DecisionCache"]
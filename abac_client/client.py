@@ -0,0 +1,226 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import httpx
+
+
+class AuthorizationError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class DecisionCache:
+    def __init__(self, ttl: float, max_size: int):
+        """
+        Initialize the DecisionCache.
+
+        This class caches authorization decisions for ttl seconds, evicting the
+        least recently used ones beyond max_size entries.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def get(self, key: Tuple[str, str]) -> Optional[bool]:
+        """
+        Get a cached decision, or None if it is missing or expired.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        decision, expires_at = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return decision
+
+    def set(self, key: Tuple[str, str], decision: bool) -> None:
+        """
+        Cache a decision.
+        """
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        self.entries[key] = (decision, time.monotonic() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+class AuthorizationClient:
+    def __init__(
+        self,
+        base_url: str,
+        cache_ttl: float = 5.0,
+        cache_max_size: int = 10000,
+        batch_window: float = 0.002,
+        max_batch_size: int = 100,
+        timeout: float = 5.0,
+        max_connections: int = 100,
+    ):
+        """
+        Initialize the AuthorizationClient.
+
+        This class queries the authorization service over a pooled HTTP
+        connection. Decisions are cached locally, and concurrent queries made
+        within batch_window seconds are sent together to POST
+        /is_authorized/batch. Identical concurrent queries share one entry of
+        the batch.
+
+        Args:
+            base_url (str): The URL of the authorization service.
+            cache_ttl (float): How long decisions are cached, 0 to disable.
+            cache_max_size (int): The maximum number of cached decisions.
+            batch_window (float): How long queries are collected, in seconds.
+            max_batch_size (int): Queries sent at once when reached.
+            timeout (float): The HTTP timeout, in seconds.
+            max_connections (int): The size of the HTTP connection pool.
+        """
+        self.http = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        self.cache = DecisionCache(cache_ttl, cache_max_size)
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.pending = {}
+        self.flush_handle = None
+        self.batches = set()
+
+    async def __aenter__(self) -> "AuthorizationClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def is_authorized(self, user_id: str, resource_id: str) -> bool:
+        """
+        Check if a user is authorized to access a resource.
+
+        Raises:
+            AuthorizationError: If the user or resource is not found, or the
+                service could not be queried.
+        """
+        key = (user_id, resource_id)
+        decision = self.cache.get(key)
+        if decision is not None:
+            return decision
+
+        future = self.pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self.pending[key] = future
+            if len(self.pending) >= self.max_batch_size:
+                self.flush()
+            elif self.flush_handle is None:
+                self.flush_handle = loop.call_later(self.batch_window, self.flush)
+
+        # A cancelled caller must not cancel the decision for the others
+        return await asyncio.shield(future)
+
+    async def evaluate(
+        self,
+        resource_id: str,
+        attributes: dict,
+        environment: dict = None,
+        user_id: str = None,
+    ) -> bool:
+        """
+        Check if caller-supplied attributes grant access to a resource,
+        without the service looking the user up. Not cached nor batched.
+
+        Raises:
+            AuthorizationError: If the resource or an attribute is not found, an
+                attribute has the wrong type, or the service could not be queried.
+        """
+        try:
+            response = await self.http.post(
+                "/is_authorized/evaluate",
+                json={
+                    "resource_id": resource_id,
+                    "attributes": attributes,
+                    "environment": environment or {},
+                    "user_id": user_id,
+                },
+            )
+            if response.status_code == 400:
+                raise AuthorizationError(response.json()["detail"])
+            response.raise_for_status()
+            return response.json()["allowed"]
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            raise AuthorizationError(str(e))
+
+    def flush(self) -> None:
+        """
+        Send the pending queries now.
+        """
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if not self.pending:
+            return
+
+        batch, self.pending = self.pending, {}
+        task = asyncio.ensure_future(self.send_batch(batch))
+        self.batches.add(task)
+        task.add_done_callback(self.batches.discard)
+
+    async def send_batch(self, batch: dict) -> None:
+        """
+        Query a batch of decisions and resolve the waiting callers.
+
+        Every caller is resolved, with an AuthorizationError when the service
+        fails, returns a malformed response, or no result for its query.
+        """
+        keys = list(batch)
+        error = "No decision returned by the service"
+        try:
+            response = await self.http.post(
+                "/is_authorized/batch",
+                json={
+                    "queries": [
+                        {"user_id": user_id, "resource_id": resource_id}
+                        for user_id, resource_id in keys
+                    ]
+                },
+            )
+            response.raise_for_status()
+            results = response.json()["results"]
+            if not isinstance(results, list) or len(results) != len(keys):
+                raise ValueError(f"Expected {len(keys)} results, got: {results!r}")
+
+            for key, result in zip(keys, results):
+                future = batch[key]
+                if future.done():
+                    continue
+                if isinstance(result, dict) and "error" in result:
+                    future.set_exception(AuthorizationError(result["error"]))
+                elif isinstance(result, dict) and type(result.get("allowed")) == bool:
+                    self.cache.set(key, result["allowed"])
+                    future.set_result(result["allowed"])
+                else:
+                    future.set_exception(
+                        AuthorizationError(f"Malformed result: {result!r}")
+                    )
+        except (httpx.HTTPError, KeyError, TypeError, ValueError) as e:
+            error = str(e)
+        finally:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(AuthorizationError(error))
+
+    async def close(self) -> None:
+        """
+        Send the pending queries and close the HTTP connections.
+        """
+        self.flush()
+        if self.batches:
+            await asyncio.gather(*self.batches, return_exceptions=True)
+        await self.http.aclose()
@@ -0,0 +1,354 @@
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from components.attribute_manager import AttributeManager
+from components.base_manager import BaseManager
+from components.policy_manager import PolicyManager
+from components.resource_manager import ResourceManager
+from components.user_manager import UserManager
+
+
+class UserColumns:
+    def __init__(self, user_ids: list, attribute_types: dict, users: list):
+        """
+        Hold the attributes of all users column-wise.
+
+        Each attribute becomes one NumPy column plus a mask of the users having
+        it: integer attributes are int64 columns, boolean attributes bool
+        columns and string attributes categorical codes into the sorted array
+        of their distinct values.
+
+        Args:
+            user_ids (list): The user IDs, in row order.
+            attribute_types (dict): The attribute registry, name to type.
+            users (list): The attributes of each user, in row order.
+        """
+        self.user_ids = user_ids
+        self.size = len(user_ids)
+        self.types = {}
+        self.present = {}
+        self.values = {}
+        self.categories = {}
+
+        for attribute_name, attribute_type in attribute_types.items():
+            raw_values = [attributes.get(attribute_name) for attributes in users]
+            present = np.array([value is not None for value in raw_values], dtype=bool)
+            if not present.any():
+                continue
+
+            if attribute_type == "integer":
+                values, present = self._integer_column(raw_values, present)
+            elif attribute_type == "boolean":
+                values = np.array(
+                    [str(value).lower() in ("1", "true") for value in raw_values],
+                    dtype=bool,
+                )
+            elif attribute_type == "string":
+                strings = np.array(
+                    ["" if value is None else str(value) for value in raw_values]
+                )
+                categories, values = np.unique(strings, return_inverse=True)
+                values = values.astype(np.int32)
+                values[~present] = -1
+                self.categories[attribute_name] = categories
+            else:
+                continue
+
+            self.types[attribute_name] = attribute_type
+            self.present[attribute_name] = present
+            self.values[attribute_name] = values
+
+    @staticmethod
+    def _integer_column(raw_values: list, present: np.ndarray) -> Tuple:
+        """
+        Parse an integer column, treating unparsable values as missing.
+        """
+        values = np.zeros(len(raw_values), dtype=np.int64)
+        present = present.copy()
+        for row, value in enumerate(raw_values):
+            if value is None:
+                continue
+            try:
+                values[row] = int(value)
+            except ValueError:
+                present[row] = False
+        return values, present
+
+    def evaluate_condition(self, condition: dict) -> np.ndarray:
+        """
+        Evaluate a condition for all users at once.
+
+        Users missing the attribute never match, as in AuthorizationManager.
+        """
+        attribute_name = condition["attribute_name"]
+        operator = condition["operator"]
+        value = condition["value"]
+
+        if attribute_name not in self.types:
+            return np.zeros(self.size, dtype=bool)
+
+        present = self.present[attribute_name]
+        values = self.values[attribute_name]
+
+        if attribute_name in self.categories:
+            categories = self.categories[attribute_name]
+            if operator == "=":
+                matching_categories = categories == str(value)
+            elif operator == "!=":
+                matching_categories = categories != str(value)
+            elif operator == "starts_with":
+                matching_categories = np.char.startswith(categories, str(value))
+            elif operator == "in":
+                matching_categories = np.isin(categories, value)
+            elif operator == "not_in":
+                matching_categories = ~np.isin(categories, value)
+            else:
+                return np.zeros(self.size, dtype=bool)
+            return present & matching_categories[np.maximum(values, 0)]
+
+        if operator == "=":
+            return present & (values == value)
+        elif operator == "!=":
+            return present & (values != value)
+        elif operator == "<":
+            return present & (values < int(value))
+        elif operator == ">":
+            return present & (values > int(value))
+        elif operator == "in":
+            return present & np.isin(values, value)
+        elif operator == "not_in":
+            return present & ~np.isin(values, value)
+        elif operator == "between":
+            return present & (values >= value[0]) & (values <= value[1])
+        return np.zeros(self.size, dtype=bool)
+
+    def evaluate_policy(self, conditions: list) -> np.ndarray:
+        """
+        Evaluate a policy for all users at once, as a packed bitmap.
+        """
+        mask = np.ones(self.size, dtype=bool)
+        for condition in conditions:
+            mask &= self.evaluate_condition(condition)
+        return np.packbits(mask)
+
+
+_worker_columns = None
+
+
+def _init_worker(columns: UserColumns) -> None:
+    global _worker_columns
+    _worker_columns = columns
+
+
+def _evaluate_policies(policies: List[Tuple[str, list]]) -> List[Tuple[str, bytes]]:
+    return [
+        (key, _worker_columns.evaluate_policy(conditions).tobytes())
+        for key, conditions in policies
+    ]
+
+
+class AccessReviewManager(BaseManager):
+    def __init__(self):
+        """
+        Initialize the AccessReviewManager.
+
+        This class computes the full user x resource decision matrix offline:
+        user attributes are loaded into NumPy columns, each distinct policy is
+        evaluated for all users at once across a process pool, and the results
+        are expanded to resources through their policy sets.
+
+        Attributes:
+            attribute_manager (AttributeManager): Manages attributes in the system.
+            policy_manager (PolicyManager): Manages policies in the system.
+            resource_manager (ResourceManager): Manages resources in the system.
+            user_manager (UserManager): Manages user attributes in the system.
+        """
+        super().__init__()
+        self.attribute_manager = AttributeManager()
+        self.policy_manager = PolicyManager()
+        self.resource_manager = ResourceManager()
+        self.user_manager = UserManager()
+
+    async def load_all(self, manager: BaseManager, load_many, page_size: int) -> list:
+        """
+        Load every entity of a manager, one SCAN batch at a time.
+        """
+        entities = []
+        cursor = 0
+        while True:
+            async for cursor, ids in manager.scan_ids(cursor, page_size):
+                if ids:
+                    entities.extend(await load_many(ids))
+            if cursor == 0:
+                return entities
+
+    async def load_user_columns(self, page_size: int) -> UserColumns:
+        """
+        Load the attribute registry and all users into columns.
+        """
+        attributes = await self.load_all(
+            self.attribute_manager, self.attribute_manager.get_attributes, page_size
+        )
+        users = await self.load_all(
+            self.user_manager, self.user_manager.get_users, page_size
+        )
+        return UserColumns(
+            [user["user_id"] for user in users],
+            {attribute["name"]: attribute["type"] for attribute in attributes},
+            [user["attributes"] for user in users],
+        )
+
+    async def evaluate_policies(
+        self, columns: UserColumns, workers: int, page_size: int
+    ) -> Dict[str, np.ndarray]:
+        """
+        Evaluate every distinct policy for all users across a process pool.
+
+        Policies with identical conditions are evaluated once.
+
+        Returns:
+            dict: The packed user bitmap of each policy ID.
+        """
+        policies = await self.load_all(
+            self.policy_manager, self.policy_manager.get_policies, page_size
+        )
+
+        distinct = {}
+        policy_keys = {}
+        for policy in policies:
+            key = json.dumps(policy["conditions"], sort_keys=True)
+            distinct.setdefault(key, policy["conditions"])
+            policy_keys[policy["policy_id"]] = key
+
+        items = list(distinct.items())
+        chunk_size = max(1, len(items) // (workers * 4))
+        chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(columns,)
+        ) as pool:
+            results = await asyncio.gather(
+                *[
+                    loop.run_in_executor(pool, _evaluate_policies, chunk)
+                    for chunk in chunks
+                ]
+            )
+
+        bitmaps = {
+            key: np.frombuffer(bitmap, dtype=np.uint8)
+            for result in results
+            for key, bitmap in result
+        }
+        return {policy_id: bitmaps[key] for policy_id, key in policy_keys.items()}
+
+    async def run(
+        self,
+        output_dir: str,
+        workers: int = None,
+        chunk_size: int = 1024,
+        page_size: int = 1000,
+    ) -> dict:
+        """
+        Compute the decision matrix and stream it to output_dir.
+
+        The output consists of:
+            users.json: the user IDs, in bit order.
+            chunk-NNNNN.npz: compressed chunks of up to chunk_size resources,
+                holding "resource_ids" and "bitmap", a uint8 matrix with one
+                row per resource whose bits (np.unpackbits, count=len(users))
+                are the decisions of each user.
+            manifest.json: a summary of the run, written last.
+
+        Args:
+            output_dir (str): The directory to write the output to.
+            workers (int): The number of worker processes, all cores by default.
+            chunk_size (int): The number of resources per output chunk.
+            page_size (int): The SCAN page size used to load the data.
+
+        Returns:
+            dict: The manifest.
+        """
+        workers = workers or os.cpu_count() or 1
+        os.makedirs(output_dir, exist_ok=True)
+
+        columns = await self.load_user_columns(page_size)
+        with open(os.path.join(output_dir, "users.json"), "w") as users_file:
+            json.dump(columns.user_ids, users_file)
+
+        policy_bitmaps = await self.evaluate_policies(columns, workers, page_size)
+        empty_row = np.packbits(np.zeros(columns.size, dtype=bool))
+
+        chunks = 0
+        resources = 0
+        resource_ids = []
+        rows = []
+
+        def flush():
+            nonlocal chunks
+            np.savez_compressed(
+                os.path.join(output_dir, f"chunk-{chunks:05d}.npz"),
+                resource_ids=np.array(resource_ids),
+                bitmap=np.stack(rows),
+            )
+            chunks += 1
+            resource_ids.clear()
+            rows.clear()
+
+        cursor = 0
+        while True:
+            async for cursor, ids in self.resource_manager.scan_ids(cursor, page_size):
+                if not ids:
+                    continue
+                for resource in await self.resource_manager.get_resources(ids):
+                    bitmaps = [
+                        policy_bitmaps[policy_id]
+                        for policy_id in resource["policy_ids"]
+                        if policy_id in policy_bitmaps
+                    ]
+                    resource_ids.append(resource["resource_id"])
+                    rows.append(np.bitwise_or.reduce(bitmaps) if bitmaps else empty_row)
+                    resources += 1
+                    if len(rows) >= chunk_size:
+                        flush()
+            if cursor == 0:
+                break
+        if rows:
+            flush()
+
+        manifest = {
+            "users": columns.size,
+            "policies": len(policy_bitmaps),
+            "resources": resources,
+            "chunks": chunks,
+            "chunk_size": chunk_size,
+            "bit_order": "big",
+        }
+        with open(os.path.join(output_dir, "manifest.json"), "w") as manifest_file:
+            json.dump(manifest, manifest_file)
+        return manifest
+
+
+async def main(args: argparse.Namespace) -> None:
+    access_review_manager = AccessReviewManager()
+    manifest = await access_review_manager.run(
+        args.output, args.workers, args.chunk_size, args.page_size
+    )
+    print(json.dumps(manifest))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compute the full user x resource access review matrix"
+    )
+    parser.add_argument("--output", default="access_review")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    parser.add_argument("--page-size", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,119 @@
+import asyncio
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from components.base_manager import request_deadline
+from exceptions import DeadlineExceeded, ServiceOverloaded
+
+
+class AdmissionController:
+    def __init__(self):
+        """
+        Initialize the AdmissionController.
+
+        This class bounds the number of requests processed concurrently. Extra
+        requests wait in a bounded queue, and are rejected right away when it
+        is full. Every admitted request gets a deadline, covering both its
+        time in the queue and its Redis calls.
+
+        Configured from the environment:
+            AUTHZ_MAX_CONCURRENCY: Requests processed concurrently (default 100).
+            AUTHZ_MAX_QUEUE: Requests waiting for a slot (default 100).
+            AUTHZ_DEADLINE_MS: Deadline of each request (default 1000).
+            AUTHZ_RETRY_AFTER: Seconds suggested to rejected callers (default 1).
+        """
+        self.max_concurrency = int(os.environ.get("AUTHZ_MAX_CONCURRENCY", 100))
+        self.max_queue = int(os.environ.get("AUTHZ_MAX_QUEUE", 100))
+        self.deadline = int(os.environ.get("AUTHZ_DEADLINE_MS", 1000)) / 1000
+        self.retry_after = int(os.environ.get("AUTHZ_RETRY_AFTER", 1))
+
+        self.active = 0
+        self.waiters = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @asynccontextmanager
+    async def admit(self):
+        """
+        Admit a request, waiting for a slot until its deadline.
+
+        The deadline is set for the duration of the request, so that the
+        managers bound their Redis calls with it.
+
+        Raises:
+            ServiceOverloaded: If the queue is full.
+            DeadlineExceeded: If the deadline passes, in the queue or later.
+        """
+        deadline = asyncio.get_running_loop().time() + self.deadline
+        await self.acquire(deadline)
+        token = request_deadline.set(deadline)
+        try:
+            yield
+        except DeadlineExceeded:
+            self.timed_out += 1
+            raise
+        finally:
+            request_deadline.reset(token)
+            self.release()
+
+    async def acquire(self, deadline: float) -> None:
+        """
+        Take a processing slot, queueing until the deadline if none is free.
+        """
+        if self.active < self.max_concurrency and not self.waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        if len(self.waiters) >= self.max_queue:
+            self.rejected += 1
+            raise ServiceOverloaded("Too many concurrent requests")
+
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self.waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, deadline - loop.time())
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before, pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                try:
+                    self.waiters.remove(waiter)
+                except ValueError:
+                    # A release() already popped it while the timeout unwound
+                    pass
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+                raise DeadlineExceeded("Request deadline exceeded while queued")
+            raise
+        self.admitted += 1
+
+    def release(self) -> None:
+        """
+        Free a processing slot, handing it over to the next queued request.
+        """
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def get_metrics(self) -> dict:
+        """
+        Get the admission metrics.
+        """
+        return {
+            "active": self.active,
+            "queue_length": len(self.waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
@@ -1,5 +1,14 @@
 from components.base_manager import BaseManager
-from exceptions import AttributeNotFound, AttributeAlreadyExists, AttributeWrongType
+from components.policy_manager import PolicyManager
+from components.user_manager import UserManager
+from typing import Optional
+from exceptions import (
+    AttributeNotFound,
+    AttributeAlreadyExists,
+    AttributeWrongType,
+    AttributeInUse,
+    PolicyNotFound,
+)
 
 
 class AttributeManager(BaseManager):
@@ -7,6 +16,8 @@ class AttributeManager(BaseManager):
         super().__init__()
         self.allowed_types = ["boolean", "string", "integer"]
         self.prefix = "attribute"
+        self.policy_manager = PolicyManager()
+        self.user_manager = UserManager()
 
     async def get_attribute(self, attribute_name: str) -> dict:
         """
@@ -17,6 +28,21 @@ class AttributeManager(BaseManager):
             raise AttributeNotFound(f"Attribute '{attribute_name}' not found")
         return {"name": attribute_name, "type": attribute_type}
 
+    async def get_attributes(self, attribute_names: list) -> list:
+        """
+        Retrieve details of several attributes in a single round trip
+        """
+        if not attribute_names:
+            return []
+        keys = [f"{self.prefix}:{attribute_name}" for attribute_name in attribute_names]
+        attribute_types = await self.redis.mget(keys)
+
+        return [
+            {"name": attribute_name, "type": attribute_type}
+            for attribute_name, attribute_type in zip(attribute_names, attribute_types)
+            if attribute_type
+        ]
+
     async def create_attribute(self, attribute_name: str, attribute_type: str) -> dict:
         """
         Create a new attribute with the given name and type
@@ -33,3 +59,63 @@ class AttributeManager(BaseManager):
 
         await self.redis.set(f"{self.prefix}:{attribute_name}", attribute_type)
         return {"status": "success"}
+
+    async def delete_attribute(
+        self, attribute_name: str, cascade: bool = False
+    ) -> dict:
+        """
+        Delete an attribute by its name.
+
+        With cascade, the policies using the attribute are deleted as well and
+        detached from their resources. Otherwise the deletion is refused while
+        any policy still uses the attribute.
+
+        The attribute is then removed from the users having it, found through
+        the attribute index, so that a recreated attribute of another type never
+        meets values of the old type. This runs in a transaction watching the
+        policy and user indexes, repeated while policies are created with the
+        attribute meanwhile.
+        """
+        await self.get_attribute(attribute_name)
+        policies_key = f"{self.policy_manager.attribute_index_prefix}:{attribute_name}"
+        users_key = f"{self.user_manager.attribute_index_prefix}:{attribute_name}"
+
+        async def delete(pipe) -> Optional[set]:
+            if await self.redis.exists(policies_key):
+                return None
+            user_ids = await self.user_manager.get_attribute_users(attribute_name)
+            pipe.multi()
+            pipe.delete(f"{self.prefix}:{attribute_name}")
+            self.user_manager.remove_attribute(pipe, attribute_name, user_ids)
+            return user_ids
+
+        deleted_policies = set()
+        while True:
+            policy_ids = await self.policy_manager.get_attribute_policies(
+                attribute_name
+            )
+            if policy_ids and not cascade:
+                raise AttributeInUse(
+                    f"Attribute '{attribute_name}' is used by {len(policy_ids)} policy(ies)"
+                )
+
+            for policy_id in policy_ids:
+                try:
+                    await self.policy_manager.delete_policy(policy_id, cascade=True)
+                    deleted_policies.add(policy_id)
+                except PolicyNotFound:
+                    # Deleted meanwhile, drop its index entry if still there
+                    await self.redis.srem(policies_key, policy_id)
+
+            user_ids = await self.redis.transaction(
+                delete, policies_key, users_key, value_from_callable=True
+            )
+            if user_ids is not None:
+                break
+
+        return {
+            "name": attribute_name,
+            "deleted": True,
+            "deleted_policies": sorted(deleted_policies),
+            "users_updated": len(user_ids),
+        }
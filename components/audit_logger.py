@@ -0,0 +1,143 @@
+import asyncio
+import os
+import time
+from components.base_manager import BaseManager
+from exceptions import DeadlineExceeded
+
+
+class AuditLogger(BaseManager):
+    def __init__(self):
+        """
+        Initialize the AuditLogger.
+
+        This class records authorization decisions to a Redis Stream without
+        adding Redis writes to the authorization path: records are put in a
+        bounded in-memory queue, and a background task writes them in
+        pipelined batches.
+
+        Configured from the environment:
+            AUDIT_STREAM: The stream key (default "audit_log").
+            AUDIT_QUEUE_SIZE: Records waiting to be written (default 10000).
+            AUDIT_BATCH_SIZE: Records written per pipeline (default 500).
+            AUDIT_STREAM_MAXLEN: Approximate cap of the stream (default 1000000).
+            AUDIT_QUEUE_FULL: "drop" records or "block" callers when the queue
+                is full (default "drop"). Blocked callers wait at most until
+                their request deadline, then drop the record.
+        """
+        super().__init__()
+        self.stream = os.environ.get("AUDIT_STREAM", "audit_log")
+        self.batch_size = int(os.environ.get("AUDIT_BATCH_SIZE", 500))
+        self.max_length = int(os.environ.get("AUDIT_STREAM_MAXLEN", 1000000))
+        self.block_when_full = os.environ.get("AUDIT_QUEUE_FULL", "drop") == "block"
+        self.queue = asyncio.Queue(
+            maxsize=int(os.environ.get("AUDIT_QUEUE_SIZE", 10000))
+        )
+        self.task = None
+
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+
+    async def record(
+        self,
+        user_id: str,
+        resource_id: str,
+        policy_id: str,
+        allowed: bool,
+        latency: float,
+    ) -> None:
+        """
+        Queue the record of a decision.
+
+        When the queue is full, the record is dropped, or with blocking, put
+        once there is room, unless the request deadline passes first.
+
+        Args:
+            user_id (str): The ID of the user.
+            resource_id (str): The ID of the resource.
+            policy_id (str): The ID of the policy that allowed access, if any.
+            allowed (bool): The decision.
+            latency (float): The time taken by the decision, in seconds.
+        """
+        entry = {
+            "user_id": user_id,
+            "resource_id": resource_id,
+            "policy_id": policy_id or "",
+            "outcome": "allow" if allowed else "deny",
+            "latency_us": int(latency * 1000000),
+            "timestamp": time.time(),
+        }
+
+        try:
+            self.queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            if not self.block_when_full:
+                self.dropped += 1
+                return
+            try:
+                await self.bounded(self.queue.put(entry))
+            except DeadlineExceeded:
+                self.dropped += 1
+                return
+        self.recorded += 1
+
+    def start(self) -> None:
+        """
+        Start writing the queued records in the background.
+        """
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.run())
+
+    async def stop(self) -> None:
+        """
+        Write the queued records and stop the background task.
+        """
+        if self.task is None:
+            return
+        await self.queue.put(None)
+        await self.task
+        self.task = None
+
+    async def run(self) -> None:
+        """
+        Write the queued records in batches until stopped.
+        """
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            stopping = None in batch
+            await self.write([entry for entry in batch if entry is not None])
+            if stopping:
+                return
+
+    async def write(self, batch: list) -> None:
+        """
+        Append a batch of records to the stream in a single round trip.
+        """
+        if not batch:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for entry in batch:
+                    pipe.xadd(
+                        self.stream, entry, maxlen=self.max_length, approximate=True
+                    )
+                await pipe.execute()
+            self.written += len(batch)
+        except Exception:
+            self.failed += len(batch)
+
+    def get_metrics(self) -> dict:
+        """
+        Get the audit log metrics.
+        """
+        return {
+            "queue_length": self.queue.qsize(),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+        }
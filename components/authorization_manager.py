@@ -1,8 +1,16 @@
+from components.audit_logger import AuditLogger
 from components.base_manager import BaseManager
+from components.condition_matcher import compile_policy
+from components.hot_key_tracker import HotKeyTracker
 from components.policy_manager import PolicyManager
 from components.resource_manager import ResourceManager
+from components.single_flight import SingleFlight
 from components.user_manager import UserManager
-import asyncio
+from collections import OrderedDict
+from exceptions import AttributeNotFound, InvalidAttributeType, PolicyNotFound
+from typing import Callable, Optional, Tuple
+import os
+import time
 
 
 class AuthorizationManager(BaseManager):
@@ -16,16 +24,50 @@ class AuthorizationManager(BaseManager):
             policy_manager (PolicyManager): Manages policies in the system.
             resource_manager (ResourceManager): Manages resources in the system.
             user_manager (UserManager): Manages user attributes in the system.
+            compiled_policies (OrderedDict): The version stamp and compiled
+                matcher of the recently evaluated policies, by policy ID, least
+                recently used first.
+            compiled_policies_size (int): How many compiled policies are kept
+                (COMPILED_POLICIES_SIZE, default 10000).
+            single_flight (SingleFlight): Coalesces concurrent identical decisions.
+            audit_logger (AuditLogger): Records every decision.
+            hot_keys (dict): Tracks the most frequent user IDs, resource IDs and
+                evaluated policy IDs.
+            attribute_types (dict): The cached type and expiry time of each
+                attribute, for evaluations with caller-supplied attributes.
+                Entries are not invalidated when an attribute is deleted or
+                recreated with another type, which other processes do, so
+                values are checked against a stale type until they expire.
+            attribute_type_ttl (float): How long attribute types are cached, in
+                seconds (ATTRIBUTE_TYPE_TTL, default 5).
         """
         super().__init__()
         self.policy_manager = PolicyManager()
         self.resource_manager = ResourceManager()
         self.user_manager = UserManager()
+        self.compiled_policies = OrderedDict()
+        self.compiled_policies_size = int(
+            os.environ.get("COMPILED_POLICIES_SIZE", 10000)
+        )
+        self.single_flight = SingleFlight()
+        self.audit_logger = AuditLogger()
+        self.hot_keys = {
+            "user_id": HotKeyTracker(),
+            "resource_id": HotKeyTracker(),
+            "policy_id": HotKeyTracker(),
+        }
+        self.attribute_types = {}
+        self.attribute_type_ttl = float(os.environ.get("ATTRIBUTE_TYPE_TTL", 5))
 
     async def is_authorized(self, user_id: str, resource_id: str) -> bool:
         """
         Check if a user is authorized to access a resource.
 
+        Concurrent identical checks share a single evaluation. Every Redis call
+        is bounded by the deadline of the current request, if any, or of the
+        request that started the shared evaluation. The decision is queued for
+        the audit log.
+
         Args:
             user_id (str): The ID of the user.
             resource_id (str): The ID of the resource.
@@ -33,64 +75,265 @@ class AuthorizationManager(BaseManager):
         Returns:
             bool: True if authorized, False otherwise.
         """
+        started = time.perf_counter()
+        self.hot_keys["user_id"].add(user_id)
+        self.hot_keys["resource_id"].add(resource_id)
+        allowed, policy_id = await self.single_flight.do(
+            (user_id, resource_id), lambda: self.decide(user_id, resource_id)
+        )
+        await self.audit_logger.record(
+            user_id, resource_id, policy_id, allowed, time.perf_counter() - started
+        )
+        return allowed
+
+    async def decide(
+        self, user_id: str, resource_id: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Evaluate the policies of a resource against the attributes of a user.
+
+        Returns:
+            tuple: The decision and the ID of the policy that allowed access, if any.
+        """
         user_attributes = await self.user_manager.get_user_attributes(user_id)
+        return await self.evaluate_resource(resource_id, user_attributes)
+
+    async def evaluate(
+        self,
+        resource_id: str,
+        attributes: dict,
+        environment: dict = None,
+        user_id: str = None,
+    ) -> bool:
+        """
+        Check if caller-supplied attributes grant access to a resource.
+
+        The user is not looked up: the attributes, for example taken from the
+        claims of a signed token, are checked against the attribute registry
+        and evaluated as is, together with environment attributes such as the
+        time or IP address, which are never stored.
+
+        Args:
+            resource_id (str): The ID of the resource.
+            attributes (dict): The user's attributes.
+            environment (dict): The environment attributes of the request.
+            user_id (str): The ID of the user, only used for the audit log and
+                hot key tracking.
+
+        Returns:
+            bool: True if authorized, False otherwise.
+
+        Raises:
+            AttributeNotFound: If an attribute is not registered.
+            InvalidAttributeType: If an attribute value does not match its type,
+                or an attribute is given both as user and environment attribute.
+        """
+        started = time.perf_counter()
+        if user_id is not None:
+            self.hot_keys["user_id"].add(user_id)
+        self.hot_keys["resource_id"].add(resource_id)
+
+        environment = environment or {}
+        overlap = sorted(attributes.keys() & environment.keys())
+        if overlap:
+            raise InvalidAttributeType(
+                f"Attributes given as both user and environment attributes: {overlap}"
+            )
+        user_attributes = {**attributes, **environment}
+        await self.validate_attributes(user_attributes)
+
+        allowed, policy_id = await self.evaluate_resource(resource_id, user_attributes)
+        await self.audit_logger.record(
+            user_id or "",
+            resource_id,
+            policy_id,
+            allowed,
+            time.perf_counter() - started,
+        )
+        return allowed
+
+    async def validate_attributes(self, attributes: dict) -> None:
+        """
+        Check caller-supplied attributes against the attribute registry.
+
+        String attributes must be strings, rather than being converted, so that
+        a number or a boolean is never compared as its string form.
+        """
+        attribute_types = await self.get_attribute_types(list(attributes))
+        for attribute_name, attribute_value in attributes.items():
+            attribute_type = attribute_types[attribute_name]
+            if attribute_type == "string" and type(attribute_value) != str:
+                raise InvalidAttributeType(
+                    f"Attribute '{attribute_name}' should be a string"
+                )
+            self.user_manager.validate_attribute_type(
+                attribute_name, attribute_type, attribute_value
+            )
+
+    async def get_attribute_types(self, attribute_names: list) -> dict:
+        """
+        Get the types of attributes, fetching the ones not cached in a single
+        round trip.
+        """
+        now = time.monotonic()
+        missing = [
+            attribute_name
+            for attribute_name in attribute_names
+            if attribute_name not in self.attribute_types
+            or self.attribute_types[attribute_name][1] < now
+        ]
+        if missing:
+            attribute_types = await self.bounded(
+                self.redis.mget(
+                    [f"attribute:{attribute_name}" for attribute_name in missing]
+                )
+            )
+            for attribute_name, attribute_type in zip(missing, attribute_types):
+                if not attribute_type:
+                    raise AttributeNotFound(
+                        f"Attribute '{attribute_name}' not found, create it first"
+                    )
+                self.attribute_types[attribute_name] = (
+                    attribute_type,
+                    now + self.attribute_type_ttl,
+                )
+
+        return {
+            attribute_name: self.attribute_types[attribute_name][0]
+            for attribute_name in attribute_names
+        }
+
+    async def evaluate_resource(
+        self, resource_id: str, user_attributes: dict
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Evaluate the policies of a resource against user attributes.
+
+        Only the effective policies are evaluated. Pruning can only turn an
+        allow into a deny, so a deny is checked against all the policies of the
+        resource when an effective policy was read at another version than the
+        one it was pruned against, the effective policies having been written
+        in between.
+
+        Returns:
+            tuple: The decision and the ID of the policy that allowed access, if any.
+        """
         resource_policies = await self.resource_manager.get_resource_policies(
             resource_id
         )
+        allowed, policy, stale = await self.evaluate_policies(
+            resource_policies, user_attributes
+        )
+        if allowed or not stale:
+            return allowed, policy
 
-        for policy in resource_policies:
-            conditions = await self.policy_manager.get_policy_conditions(policy)
-            if await self.evaluate_policy(conditions, user_attributes):
-                return True
-
-        return False
+        resource = await self.resource_manager.get_resource(resource_id)
+        allowed, policy, _ = await self.evaluate_policies(
+            dict.fromkeys(resource["policy_ids"]), user_attributes
+        )
+        return allowed, policy
 
-    async def evaluate_policy(self, conditions: list, user_attributes: dict) -> bool:
+    async def evaluate_policies(
+        self, policies: dict, user_attributes: dict
+    ) -> Tuple[bool, Optional[str], bool]:
         """
-        Evaluate a policy's conditions against user attributes.
+        Evaluate policies against user attributes until one allows access.
 
         Args:
-            conditions (list): A list of conditions defining the policy.
+            policies (dict): The version stamp each policy was pruned against,
+                None if not pruned.
             user_attributes (dict): The user's attributes.
 
         Returns:
-            bool: True if the policy's conditions are met, False otherwise.
+            tuple: The decision, the ID of the policy that allowed access, if
+                any, and whether a pruned policy was read at another version or
+                found deleted.
+
+        Raises:
+            PolicyNotFound: If a policy that was not pruned does not exist.
+        """
+        stale = False
+        for policy, pruned_version in policies.items():
+            self.hot_keys["policy_id"].add(policy)
+            try:
+                version, conditions = (
+                    await self.policy_manager.get_versioned_conditions(policy)
+                )
+            except PolicyNotFound:
+                self.compiled_policies.pop(policy, None)
+                if pruned_version is None:
+                    raise
+                stale = True
+                continue
+            if pruned_version is not None and (version or "0") != pruned_version:
+                stale = True
+            if self.get_policy_matcher(policy, version, conditions)(user_attributes):
+                return True, policy, stale
+
+        return False, None, stale
+
+    def get_metrics(self) -> dict:
         """
+        Get the coalescing and audit log metrics of the authorization path.
+        """
+        return {
+            "single_flight": {
+                "decisions": self.single_flight.get_metrics(),
+                "user_attributes": self.user_manager.single_flight.get_metrics(),
+                "resource_policies": self.resource_manager.single_flight.get_metrics(),
+                "policy_conditions": self.policy_manager.single_flight.get_metrics(),
+            },
+            "audit_log": self.audit_logger.get_metrics(),
+        }
 
-        async def evaluate_condition(condition):
-            attribute_name = condition["attribute_name"]
-            operator = condition["operator"]
-            value = condition["value"]
+    def get_hot_keys(self, limit: int) -> dict:
+        """
+        Get the most frequent keys of each kind with their estimated counts.
+        """
+        return {
+            kind: {"total": tracker.total, "top": tracker.get_top(limit)}
+            for kind, tracker in self.hot_keys.items()
+        }
 
-            if attribute_name not in user_attributes:
-                return False
+    def reset_hot_keys(self) -> None:
+        """
+        Forget the counts of all keys.
+        """
+        for tracker in self.hot_keys.values():
+            tracker.reset()
 
-            user_value = user_attributes[attribute_name]
+    def get_policy_matcher(
+        self, policy_id: str, version: Optional[str], conditions: list
+    ) -> Callable[[dict], bool]:
+        """
+        Get the compiled matcher of a policy.
 
-            # Convert value to appropriate type for comparison
-            if type(value) == bool:
-                user_value = int(user_value) == 1
-            elif type(value) == int:
-                user_value = int(user_value)
+        The matcher is compiled once per version stamp, as every write of a
+        policy bumps it, so reusing it is a constant-time check however large
+        the conditions. Only the most recently used policies are kept, and
+        deleted policies are dropped when next looked up.
+        """
+        compiled = self.compiled_policies.get(policy_id)
+        if compiled is not None and compiled[0] == version:
+            self.compiled_policies.move_to_end(policy_id)
+            return compiled[1]
 
-            if operator == "=":
-                if user_value != value:
-                    return False
-            elif operator == "<":
-                if int(user_value) >= int(value):
-                    return False
-            elif operator == ">":
-                if int(user_value) <= int(value):
-                    return False
-            elif operator == "starts_with":
-                if not user_value.startswith(value):
-                    return False
+        matcher = compile_policy(conditions)
+        self.compiled_policies[policy_id] = (version, matcher)
+        self.compiled_policies.move_to_end(policy_id)
+        if len(self.compiled_policies) > self.compiled_policies_size:
+            self.compiled_policies.popitem(last=False)
+        return matcher
 
-            return True
+    async def evaluate_policy(self, conditions: list, user_attributes: dict) -> bool:
+        """
+        Evaluate a policy's conditions against user attributes.
 
-        async def evaluate_conditions(conditions):
-            tasks = [evaluate_condition(condition) for condition in conditions]
-            results = await asyncio.gather(*tasks)
-            return all(results)
+        Args:
+            conditions (list): A list of conditions defining the policy.
+            user_attributes (dict): The user's attributes.
 
-        return await evaluate_conditions(conditions)
+        Returns:
+            bool: True if the policy's conditions are met, False otherwise.
+        """
+        return compile_policy(conditions)(user_attributes)
@@ -1,5 +1,21 @@
+import asyncio
+import contextvars
 import redis.asyncio as redis
 import os
+from exceptions import AttributeNotFound, DeadlineExceeded
+from typing import Any, AsyncIterator, Awaitable, Optional, Tuple
+
+# The event loop time by which the current request must complete, if any
+request_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+
+def escape_match_pattern(value: str) -> str:
+    """
+    Escape the glob characters of a value used in a SCAN MATCH pattern.
+    """
+    for char in ("\\", "*", "?", "[", "]"):
+        value = value.replace(char, f"\\{char}")
+    return value
 
 
 class BaseManager:
@@ -21,6 +37,69 @@ class BaseManager:
             decode_responses=True,
         )
 
+    def bump_version(self, pipe, entity_id: str, prefix: str = None) -> None:
+        """
+        Queue the increment of an entity's version stamp on a pipeline.
+
+        Version stamps are kept in one hash per entity type,
+        {prefix}_versions, and never reset, so that a deleted and recreated
+        entity does not reuse a version.
+        """
+        pipe.hincrby(f"{prefix or self.prefix}_versions", entity_id, 1)
+
+    async def get_version(self, entity_id: str) -> Optional[str]:
+        """
+        Get the version stamp of an entity, None if it was never written.
+        """
+        return await self.redis.hget(f"{self.prefix}_versions", entity_id)
+
+    async def watch_attributes(self, pipe, attribute_names) -> dict:
+        """
+        WATCH attributes on a transaction and read their types, so that it
+        fails if any of them is deleted or recreated before it is executed.
+
+        Returns:
+            dict: The type of each attribute.
+
+        Raises:
+            AttributeNotFound: If an attribute does not exist.
+        """
+        attribute_names = list(attribute_names)
+        if not attribute_names:
+            return {}
+        keys = [f"attribute:{attribute_name}" for attribute_name in attribute_names]
+        await pipe.watch(*keys)
+        attribute_types = await self.redis.mget(keys)
+        for attribute_name, attribute_type in zip(attribute_names, attribute_types):
+            if not attribute_type:
+                raise AttributeNotFound(
+                    f"Attribute '{attribute_name}' not found, create it first"
+                )
+        return dict(zip(attribute_names, attribute_types))
+
+    async def bounded(self, awaitable: Awaitable) -> Any:
+        """
+        Await a Redis call within the deadline of the current request.
+
+        Without a request deadline, the call is awaited as is.
+
+        Raises:
+            DeadlineExceeded: If the deadline passes before the call completes.
+        """
+        deadline = request_deadline.get()
+        if deadline is None:
+            return await awaitable
+
+        remaining = deadline - asyncio.get_running_loop().time()
+        try:
+            if remaining <= 0:
+                if asyncio.iscoroutine(awaitable):
+                    awaitable.close()
+                raise asyncio.TimeoutError
+            return await asyncio.wait_for(awaitable, remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("Request deadline exceeded") from None
+
     async def close(self):
         """
         Close the connection to the Redis server.
@@ -28,3 +107,32 @@ class BaseManager:
         This method is used to close the connection when it's no longer needed.
         """
         await self.redis.close()
+
+    async def scan_ids(
+        self, cursor: int = 0, page_size: int = 100, id_prefix: str = ""
+    ) -> AsyncIterator[Tuple[int, list]]:
+        """
+        Iterate over one page of entity IDs using SCAN, never blocking Redis.
+
+        Yields the IDs batch by batch (possibly empty), each with the cursor
+        to resume from, until at least page_size IDs were yielded or the
+        keyspace is exhausted (cursor 0). A batch is never split, so a page may
+        slightly exceed page_size, since SCAN COUNT is only a hint.
+
+        Args:
+            cursor (int): The cursor to resume from, 0 to start a new iteration.
+            page_size (int): The number of IDs to yield before stopping.
+            id_prefix (str): Only yield IDs starting with this prefix.
+        """
+        match = f"{self.prefix}:{escape_match_pattern(id_prefix)}*"
+        prefix_length = len(self.prefix) + 1
+        collected = 0
+
+        while True:
+            cursor, keys = await self.redis.scan(
+                cursor=cursor, match=match, count=page_size
+            )
+            collected += len(keys)
+            yield cursor, [key[prefix_length:] for key in keys]
+            if cursor == 0 or collected >= page_size:
+                return
@@ -0,0 +1,233 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from typing import Awaitable, Callable, List
+
+import httpx
+
+from abac_client.client import AuthorizationClient
+from components.load_test import summarize
+
+
+def count_requests(http: httpx.AsyncClient) -> list:
+    """
+    Count the HTTP requests sent by a client, in the returned one-item list.
+    """
+    sent = [0]
+
+    async def on_request(request: httpx.Request) -> None:
+        sent[0] += 1
+
+    http.event_hooks = {"request": [on_request], "response": []}
+    return sent
+
+
+def response_size(response: httpx.Response) -> int:
+    """
+    Approximate the bytes of an HTTP/1.1 response on the wire.
+    """
+    status_line = f"HTTP/1.1 {response.status_code} {response.reason_phrase}\r\n"
+    headers = sum(len(name) + len(value) + 4 for name, value in response.headers.raw)
+    return len(status_line) + headers + 2 + len(response.content)
+
+
+async def drive(
+    call: Callable[..., Awaitable],
+    queries: List[tuple],
+    concurrency: int,
+) -> dict:
+    """
+    Make the queries from concurrent callers, each waiting for its previous
+    query before making the next one. Each query is a tuple of the arguments
+    of call.
+    """
+    latencies = []
+    errors = 0
+    pending = iter(queries)
+
+    async def caller() -> None:
+        nonlocal errors
+        for query in pending:
+            started = time.perf_counter()
+            try:
+                await call(*query)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[caller() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    return {
+        "calls": len(queries),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "calls_per_second": round(len(queries) / elapsed, 1),
+        "latency_ms": summarize(latencies),
+    }
+
+
+async def benchmark_naive(args: argparse.Namespace, queries: list) -> dict:
+    """
+    Send one GET /is_authorized per query, over a pooled connection.
+    """
+    async with httpx.AsyncClient(
+        base_url=args.url,
+        timeout=args.timeout,
+        limits=httpx.Limits(
+            max_connections=args.connections,
+            max_keepalive_connections=args.connections,
+        ),
+    ) as http:
+        sent = count_requests(http)
+
+        async def call(user_id: str, resource_id: str) -> bool:
+            response = await http.get(
+                "/is_authorized",
+                params={"user_id": user_id, "resource_id": resource_id},
+            )
+            response.raise_for_status()
+            return response.json()["allowed"]
+
+        report = await drive(call, queries, args.concurrency)
+    report["http_requests"] = sent[0]
+    return report
+
+
+async def benchmark_client(
+    args: argparse.Namespace, queries: list, cache_ttl: float
+) -> dict:
+    """
+    Query through the AuthorizationClient, batching and caching decisions.
+    """
+    async with AuthorizationClient(
+        args.url,
+        cache_ttl=cache_ttl,
+        timeout=args.timeout,
+        max_connections=args.connections,
+    ) as client:
+        sent = count_requests(client.http)
+        report = await drive(client.is_authorized, queries, args.concurrency)
+    report["http_requests"] = sent[0]
+    return report
+
+
+async def batching(args: argparse.Namespace) -> dict:
+    """
+    Compare naive per-call requests with the client, without and with its
+    decision cache, on the same random queries.
+    """
+    rng = random.Random(args.seed)
+    user_ids = args.user_ids.split(",")
+    resource_ids = args.resource_ids.split(",")
+    queries = [
+        (rng.choice(user_ids), rng.choice(resource_ids)) for _ in range(args.calls)
+    ]
+    return {
+        "naive": await benchmark_naive(args, queries),
+        "client_batched": await benchmark_client(args, queries, 0),
+        "client_cached": await benchmark_client(args, queries, args.cache_ttl),
+    }
+
+
+async def benchmark_polling(
+    args: argparse.Namespace, paths: list, conditional: bool
+) -> dict:
+    """
+    Poll entities, sending back the ETag of the first response of each when
+    conditional.
+    """
+    async with httpx.AsyncClient(
+        base_url=args.url,
+        timeout=args.timeout,
+        limits=httpx.Limits(
+            max_connections=args.connections,
+            max_keepalive_connections=args.connections,
+        ),
+    ) as http:
+        etags = {}
+        if conditional:
+            for path in set(paths):
+                response = await http.get(path)
+                response.raise_for_status()
+                etags[path] = response.headers["ETag"]
+
+        received = 0
+        statuses = Counter()
+
+        async def call(path: str) -> None:
+            nonlocal received
+            headers = {"If-None-Match": etags[path]} if conditional else {}
+            response = await http.get(path, headers=headers)
+            received += response_size(response)
+            statuses[response.status_code] += 1
+            if response.status_code >= 400:
+                response.raise_for_status()
+
+        report = await drive(call, [(path,) for path in paths], args.concurrency)
+    report["statuses"] = dict(statuses)
+    report["bytes_received"] = received
+    report["bytes_per_call"] = round(received / len(paths), 1)
+    return report
+
+
+async def etag(args: argparse.Namespace) -> dict:
+    """
+    Compare polling unchanged entities with and without If-None-Match.
+    """
+    rng = random.Random(args.seed)
+    entity_paths = args.paths.split(",")
+    paths = [rng.choice(entity_paths) for _ in range(args.calls)]
+    unconditional = await benchmark_polling(args, paths, False)
+    conditional = await benchmark_polling(args, paths, True)
+    return {
+        "unconditional": unconditional,
+        "conditional": conditional,
+        "bytes_saved": unconditional["bytes_received"] - conditional["bytes_received"],
+        "bytes_saved_ratio": round(
+            1 - conditional["bytes_received"] / unconditional["bytes_received"], 3
+        ),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(json.dumps(await args.benchmark(args)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark a running authorization service"
+    )
+    parser.add_argument("--url", default="http://localhost")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--connections", type=int, default=100)
+    benchmarks = parser.add_subparsers(required=True)
+
+    batching_parser = benchmarks.add_parser(
+        "batching", help="Compare the client with naive per-call requests"
+    )
+    batching_parser.add_argument("--calls", type=int, default=10000)
+    batching_parser.add_argument("--concurrency", type=int, default=200)
+    batching_parser.add_argument("--user-ids", default="elonmusk")
+    batching_parser.add_argument("--resource-ids", default="diamond")
+    batching_parser.add_argument("--cache-ttl", type=float, default=5.0)
+    batching_parser.add_argument("--seed", type=int, default=0)
+    batching_parser.set_defaults(benchmark=batching)
+
+    etag_parser = benchmarks.add_parser(
+        "etag", help="Compare polling entities with and without If-None-Match"
+    )
+    etag_parser.add_argument("--calls", type=int, default=10000)
+    etag_parser.add_argument("--concurrency", type=int, default=50)
+    etag_parser.add_argument(
+        "--paths",
+        default="/users/elonmusk",
+        help="Comma-separated entity paths, such as /policies/adults",
+    )
+    etag_parser.add_argument("--seed", type=int, default=0)
+    etag_parser.set_defaults(benchmark=etag)
+
+    asyncio.run(main(parser.parse_args()))
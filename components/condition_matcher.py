@@ -0,0 +1,106 @@
+from typing import Callable
+
+_MISSING = object()
+
+
+def _compile_test(operator: str, value) -> Callable:
+    """
+    Compile an operator and its value into a test of a present user value.
+
+    User values are converted according to the type of the condition value,
+    as they are stored as strings in Redis.
+    """
+    if operator in ("in", "not_in"):
+        if all(type(member) == int for member in value):
+            members = frozenset(value)
+
+            def is_member(user_value):
+                return int(user_value) in members
+
+        else:
+            members = frozenset(value)
+
+            def is_member(user_value):
+                return user_value in members
+
+        if operator == "in":
+            return is_member
+        return lambda user_value: not is_member(user_value)
+
+    if operator == "between":
+        low, high = value
+        return lambda user_value: low <= int(user_value) <= high
+
+    if operator == "<":
+        return lambda user_value: int(user_value) < value
+    if operator == ">":
+        return lambda user_value: int(user_value) > value
+    if operator == "starts_with":
+        return lambda user_value: user_value.startswith(value)
+
+    if type(value) == bool:
+
+        def equals(user_value):
+            return (int(user_value) == 1) == value
+
+    elif type(value) == int:
+
+        def equals(user_value):
+            return int(user_value) == value
+
+    else:
+
+        def equals(user_value):
+            return user_value == value
+
+    if operator == "=":
+        return equals
+    if operator == "!=":
+        return lambda user_value: not equals(user_value)
+
+    # Unknown operators never match
+    return lambda user_value: False
+
+
+def compile_condition(condition: dict) -> Callable[[dict], bool]:
+    """
+    Compile a condition into a matcher of user attributes.
+
+    Set operators check membership in a prebuilt frozenset and "between" is a
+    single bounds check. Users missing the attribute never match, whatever the
+    operator.
+
+    Args:
+        condition (dict): The condition, with attribute_name, operator and value.
+
+    Returns:
+        Callable[[dict], bool]: A function telling whether user attributes
+            satisfy the condition.
+    """
+    attribute_name = condition["attribute_name"]
+    test = _compile_test(condition["operator"], condition["value"])
+
+    def matcher(user_attributes: dict) -> bool:
+        user_value = user_attributes.get(attribute_name, _MISSING)
+        if user_value is _MISSING:
+            return False
+        return test(user_value)
+
+    return matcher
+
+
+def compile_policy(conditions: list) -> Callable[[dict], bool]:
+    """
+    Compile the conditions of a policy into a matcher of user attributes.
+
+    A policy matches when all of its conditions do.
+    """
+    matchers = tuple(compile_condition(condition) for condition in conditions)
+
+    def matcher(user_attributes: dict) -> bool:
+        for condition_matcher in matchers:
+            if not condition_matcher(user_attributes):
+                return False
+        return True
+
+    return matcher
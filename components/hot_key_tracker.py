@@ -0,0 +1,95 @@
+import random
+from array import array
+from typing import Hashable
+
+# A Mersenne prime, for the pairwise independent hash function of each row
+_PRIME = (1 << 61) - 1
+
+
+class CountMinSketch:
+    def __init__(self, width: int = 2048, depth: int = 4):
+        """
+        Initialize the CountMinSketch.
+
+        This class estimates the frequency of keys in constant memory: each
+        key increments one counter per row, and its estimate is the smallest
+        of them. Estimates never undercount, and overcount by at most about
+        2 / width of the total count with high probability.
+        """
+        self.width = width
+        self.hashes = [
+            (random.randrange(1, _PRIME), random.randrange(0, _PRIME))
+            for _ in range(depth)
+        ]
+        self.rows = [array("Q", [0]) * width for _ in range(depth)]
+
+    def add(self, key: Hashable) -> int:
+        """
+        Count a key once and return its estimated frequency.
+        """
+        key_hash = hash(key)
+        estimate = None
+        for (a, b), row in zip(self.hashes, self.rows):
+            index = (a * key_hash + b) % _PRIME % self.width
+            row[index] += 1
+            if estimate is None or row[index] < estimate:
+                estimate = row[index]
+        return estimate
+
+    def estimate(self, key: Hashable) -> int:
+        """
+        Get the estimated frequency of a key.
+        """
+        key_hash = hash(key)
+        return min(
+            row[(a * key_hash + b) % _PRIME % self.width]
+            for (a, b), row in zip(self.hashes, self.rows)
+        )
+
+
+class HotKeyTracker:
+    def __init__(self, top_k: int = 50, width: int = 2048, depth: int = 4):
+        """
+        Initialize the HotKeyTracker.
+
+        This class tracks the most frequent keys in constant memory: a
+        Count-Min Sketch estimates the frequency of every key, and the top_k
+        keys with the highest estimates are kept as heavy hitters.
+        """
+        self.top_k = top_k
+        self.width = width
+        self.depth = depth
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Forget all counts.
+        """
+        self.sketch = CountMinSketch(self.width, self.depth)
+        self.heavy_hitters = {}
+        # A lower bound of the smallest heavy hitter estimate once full
+        self.floor = 0
+        self.total = 0
+
+    def add(self, key: Hashable) -> None:
+        """
+        Count an occurrence of a key.
+        """
+        self.total += 1
+        estimate = self.sketch.add(key)
+
+        if key in self.heavy_hitters or len(self.heavy_hitters) < self.top_k:
+            self.heavy_hitters[key] = estimate
+        elif estimate > self.floor:
+            coldest = min(self.heavy_hitters, key=self.heavy_hitters.get)
+            if estimate > self.heavy_hitters[coldest]:
+                del self.heavy_hitters[coldest]
+                self.heavy_hitters[key] = estimate
+            self.floor = min(self.heavy_hitters.values())
+
+    def get_top(self, limit: int) -> list:
+        """
+        Get the most frequent keys with their estimated counts, most frequent first.
+        """
+        top = sorted(self.heavy_hitters.items(), key=lambda item: -item[1])[:limit]
+        return [{"key": key, "count": count} for key, count in top]
@@ -0,0 +1,26 @@
+import argparse
+import asyncio
+import json
+from components.resource_manager import ResourceManager
+from components.user_manager import UserManager
+
+
+async def main(args: argparse.Namespace) -> None:
+    resource_manager = ResourceManager()
+    user_manager = UserManager()
+    report = {
+        "policies": await resource_manager.policy_manager.rebuild_attribute_index(
+            args.page_size
+        ),
+        "resources": await resource_manager.rebuild_policy_index(args.page_size),
+        "users": await user_manager.rebuild_attribute_index(args.page_size),
+    }
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Add existing policies, resources and users to the reverse-reference indexes"
+    )
+    parser.add_argument("--page-size", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
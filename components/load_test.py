@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from typing import Awaitable, Callable
+
+import httpx
+
+from components.admission_controller import AdmissionController
+from components.base_manager import BaseManager
+from exceptions import DeadlineExceeded, ServiceOverloaded
+
+
+def summarize(latencies: list) -> dict:
+    """
+    Summarize latencies in seconds as milliseconds percentiles.
+    """
+    ordered = sorted(latencies)
+
+    def percentile(fraction: float) -> float:
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return round(ordered[index] * 1000, 2)
+
+    return {
+        "count": len(ordered),
+        "p50": percentile(0.5),
+        "p90": percentile(0.9),
+        "p99": percentile(0.99),
+        "max": round(ordered[-1] * 1000, 2),
+    }
+
+
+async def simulated_request(
+    controller: AdmissionController, manager: BaseManager, service_time: float
+) -> str:
+    """
+    Send a request through an in-process admission controller, its work being
+    a call of service_time seconds bounded by the request deadline, as Redis
+    calls are.
+    """
+    try:
+        async with controller.admit():
+            await manager.bounded(asyncio.sleep(service_time))
+        return "ok"
+    except ServiceOverloaded:
+        return "rejected"
+    except DeadlineExceeded:
+        return "timed_out"
+
+
+async def http_request(http: httpx.AsyncClient, user_id: str, resource_id: str) -> str:
+    """
+    Send an authorization query to a running service.
+    """
+    response = await http.get(
+        "/is_authorized", params={"user_id": user_id, "resource_id": resource_id}
+    )
+    if response.status_code == 200:
+        return "ok"
+    if response.status_code == 503:
+        if "Too many" in response.json()["detail"]:
+            return "rejected"
+        return "timed_out"
+    return f"status_{response.status_code}"
+
+
+async def run(send: Callable[[], Awaitable[str]], requests: int, rate: float) -> dict:
+    """
+    Send requests at a fixed arrival rate, whether or not earlier ones have
+    completed, and report the outcomes and the latency of each outcome.
+    """
+    loop = asyncio.get_running_loop()
+    outcomes = Counter()
+    latencies = {}
+
+    async def timed() -> None:
+        started = time.perf_counter()
+        try:
+            outcome = await send()
+        except Exception as e:
+            outcome = type(e).__name__
+        outcomes[outcome] += 1
+        latencies.setdefault(outcome, []).append(time.perf_counter() - started)
+
+    tasks = []
+    started = loop.time()
+    for index in range(requests):
+        delay = started + index / rate - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(timed()))
+    await asyncio.gather(*tasks)
+
+    return {
+        "requests": requests,
+        "rate": rate,
+        "duration": round(loop.time() - started, 3),
+        "outcomes": dict(outcomes),
+        "latency_ms": {
+            outcome: summarize(values) for outcome, values in latencies.items()
+        },
+        "all_latency_ms": summarize(
+            [latency for values in latencies.values() for latency in values]
+        ),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.url:
+        async with httpx.AsyncClient(
+            base_url=args.url,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=None),
+            timeout=args.timeout,
+        ) as http:
+            report = await run(
+                lambda: http_request(http, args.user_id, args.resource_id),
+                args.requests,
+                args.rate,
+            )
+    else:
+        controller = AdmissionController()
+        manager = BaseManager()
+        report = await run(
+            lambda: simulated_request(controller, manager, args.service_ms / 1000),
+            args.requests,
+            args.rate,
+        )
+        report["capacity"] = controller.max_concurrency / (args.service_ms / 1000)
+        report["deadline_ms"] = controller.deadline * 1000
+        report["admission"] = controller.get_metrics()
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Drive authorization queries past the admission limits and "
+        "report the latency distribution and the rejected and timed out counts"
+    )
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=2000, help="Requests per second")
+    parser.add_argument(
+        "--service-ms",
+        type=float,
+        default=100,
+        help="Simulated work per request, without --url",
+    )
+    parser.add_argument("--url", help="A running service, instead of simulating it")
+    parser.add_argument("--user-id", default="elonmusk")
+    parser.add_argument("--resource-id", default="diamond")
+    parser.add_argument("--timeout", type=float, default=30)
+    asyncio.run(main(parser.parse_args()))
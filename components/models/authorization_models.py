@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Union
+
+
+class AuthorizationQuery(BaseModel):
+    user_id: str
+    resource_id: str
+
+
+class AuthorizationBatch(BaseModel):
+    queries: List[AuthorizationQuery] = Field(max_length=1000)
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "queries": [
+                        {"user_id": "elonmusk", "resource_id": "diamond"},
+                        {"user_id": "elonmusk", "resource_id": "gold"},
+                    ]
+                }
+            ]
+        }
+    }
+
+
+class Evaluation(BaseModel):
+    resource_id: str
+    attributes: Dict[str, Union[str, bool, int]]
+    environment: Dict[str, Union[str, bool, int]] = {}
+    user_id: Optional[str] = None
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "resource_id": "diamond",
+                    "attributes": {"works_at": "X", "age": 52},
+                    "environment": {"office_hours": True},
+                    "user_id": "elonmusk",
+                }
+            ]
+        }
+    }
@@ -5,7 +5,7 @@ from typing import List
 class Condition(BaseModel):
     attribute_name: str
     operator: str
-    value: str | int | bool
+    value: str | int | bool | List[int] | List[str]
 
     model_config = {
         "json_schema_extra": {
@@ -31,6 +31,16 @@ class Policy(BaseModel):
                         },
                         {"attribute_name": "age", "operator": ">", "value": 50},
                         {"attribute_name": "happy", "operator": "=", "value": True},
+                        {
+                            "attribute_name": "department",
+                            "operator": "in",
+                            "value": ["sales", "legal", "finance"],
+                        },
+                        {
+                            "attribute_name": "level",
+                            "operator": "between",
+                            "value": [3, 7],
+                        },
                     ],
                 }
             ]
@@ -0,0 +1,181 @@
+import argparse
+import asyncio
+import json
+from typing import Optional
+
+# Finite integer ranges up to this size may be checked against value sets
+MAX_ENUMERATED_RANGE = 1024
+
+
+def condition_domain(condition: dict) -> Optional[tuple]:
+    """
+    Describe the set of attribute values satisfying a condition.
+
+    Returns:
+        tuple: (value family, kind, data), where kind is one of:
+            "set": the values in data (a frozenset),
+            "not_set": the values not in data (a frozenset),
+            "range": the integers between data[0] and data[1], None if unbounded,
+            "prefix": the strings starting with data.
+        None if the condition is not understood.
+    """
+    operator = condition["operator"]
+    value = condition["value"]
+
+    sample = value[0] if isinstance(value, list) and value else value
+    if type(sample) == bool:
+        family = "boolean"
+    elif type(sample) == int:
+        family = "integer"
+    elif type(sample) == str:
+        family = "string"
+    else:
+        return None
+
+    if operator == "in":
+        return family, "set", frozenset(value)
+    if operator == "not_in":
+        return family, "not_set", frozenset(value)
+    if family == "boolean":
+        if operator == "=":
+            return family, "set", frozenset([value])
+        if operator == "!=":
+            return family, "set", frozenset([not value])
+        return None
+    if operator == "=":
+        return family, "set", frozenset([value])
+    if operator == "!=":
+        return family, "not_set", frozenset([value])
+    if family == "integer":
+        if operator == "<":
+            return family, "range", (None, value - 1)
+        if operator == ">":
+            return family, "range", (value + 1, None)
+        if operator == "between":
+            return family, "range", tuple(value)
+    if family == "string" and operator == "starts_with":
+        return family, "prefix", value
+    return None
+
+
+def _in_range(bounds: tuple, value) -> bool:
+    low, high = bounds
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+def _contains_value(kind: str, data, value) -> bool:
+    if kind == "set":
+        return value in data
+    if kind == "not_set":
+        return value not in data
+    if kind == "range":
+        return _in_range(data, value)
+    return value.startswith(data)
+
+
+def domain_contains(outer: tuple, inner: tuple) -> bool:
+    """
+    Tell whether every value of the inner domain belongs to the outer one.
+
+    The check is conservative: False may be returned for domains that are
+    actually contained, never the other way around.
+    """
+    outer_family, outer_kind, outer_data = outer
+    inner_family, inner_kind, inner_data = inner
+    if outer_family != inner_family:
+        return False
+
+    if inner_kind == "set":
+        return all(_contains_value(outer_kind, outer_data, v) for v in inner_data)
+
+    if outer_kind == "not_set":
+        if inner_kind == "not_set":
+            return outer_data <= inner_data
+        return not any(_contains_value(inner_kind, inner_data, v) for v in outer_data)
+
+    if outer_kind == "range" and inner_kind == "range":
+        (outer_low, outer_high), (inner_low, inner_high) = outer_data, inner_data
+        return (
+            outer_low is None or (inner_low is not None and inner_low >= outer_low)
+        ) and (
+            outer_high is None or (inner_high is not None and inner_high <= outer_high)
+        )
+
+    if outer_kind == "prefix" and inner_kind == "prefix":
+        return inner_data.startswith(outer_data)
+
+    if outer_kind == "set" and inner_kind == "range":
+        low, high = inner_data
+        if low is None or high is None or high - low >= MAX_ENUMERATED_RANGE:
+            return False
+        return all(value in outer_data for value in range(low, high + 1))
+
+    return False
+
+
+def subsumes(general: list, specific: list) -> bool:
+    """
+    Tell whether every user satisfying the specific policy satisfies the
+    general one, so that the specific policy never changes a decision.
+
+    Holds when each condition of the general policy is implied by a condition
+    of the specific one on the same attribute. Users missing an attribute
+    satisfy no condition on it, so this reasoning only needs the values.
+    """
+    specific_domains = [
+        (condition["attribute_name"], condition_domain(condition))
+        for condition in specific
+    ]
+    for condition in general:
+        domain = condition_domain(condition)
+        if domain is None:
+            return False
+        if not any(
+            attribute_name == condition["attribute_name"]
+            and specific_domain is not None
+            and domain_contains(domain, specific_domain)
+            for attribute_name, specific_domain in specific_domains
+        ):
+            return False
+    return True
+
+
+def prune_policies(policies: dict) -> set:
+    """
+    Remove the policies subsumed by others from a resource's policies.
+
+    Policies are removed one at a time, most specific first, and only when
+    subsumed by a policy still kept. The users allowed by the kept policies are
+    thus exactly those allowed by all of them, and decisions are unchanged.
+
+    Args:
+        policies (dict): The conditions of each policy ID.
+
+    Returns:
+        set: The IDs of the policies to evaluate.
+    """
+    kept = set(policies)
+    for policy_id in sorted(policies, key=lambda p: (-len(policies[p]), p)):
+        if any(
+            other_id != policy_id and subsumes(policies[other_id], policies[policy_id])
+            for other_id in kept
+        ):
+            kept.discard(policy_id)
+    return kept
+
+
+async def main(args: argparse.Namespace) -> None:
+    # Imported here, as the policy manager depends on this module
+    from components.resource_manager import ResourceManager
+
+    resource_manager = ResourceManager()
+    report = await resource_manager.prune_all_resources(args.page_size)
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Prune the subsumed policies of every resource"
+    )
+    parser.add_argument("--page-size", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
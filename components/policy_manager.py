@@ -1,12 +1,14 @@
 from components.base_manager import BaseManager
 from components.models.policy_models import Condition
-from typing import Any, List
+from components.policy_analyzer import prune_policies
+from components.single_flight import SingleFlight
+from typing import Any, List, Optional, Tuple
 from exceptions import (
     PolicyAlreadyExists,
     InvalidPolicyConditions,
-    AttributeNotFound,
     InvalidAttributeType,
     PolicyNotFound,
+    PolicyInUse,
 )
 
 
@@ -17,10 +19,21 @@ class PolicyManager(BaseManager):
 
         This class manages policies, including creation and validation.
 
-        Initializes the prefix for policy keys.
+        Initializes the prefix for policy keys and the prefixes of the
+        reverse-reference indexes:
+            attribute_policies:{attribute_name} -> set of policy IDs using the attribute
+            policy_resources:{policy_id} -> set of resource IDs using the policy
+        and of the pruned policies evaluated for each resource:
+            resource_effective_policies:{resource_id} -> hash of policy IDs to
+                the version stamp of the policy they were pruned against
+        Concurrent condition lookups of the same policy are coalesced.
         """
         super().__init__()
+        self.single_flight = SingleFlight()
         self.prefix = "policy"
+        self.attribute_index_prefix = "attribute_policies"
+        self.resource_index_prefix = "policy_resources"
+        self.effective_prefix = "resource_effective_policies"
 
     async def create_policy(self, policy_id: str, conditions: List[Condition]) -> list:
         """
@@ -29,7 +42,6 @@ class PolicyManager(BaseManager):
         conditions = [condition.model_dump() for condition in conditions]
 
         await self.check_existing_policy(policy_id)
-        await self.validate_policy_conditions(conditions)
         await self.create_new_policy(policy_id, conditions)
 
         return await self.get_policy(policy_id)
@@ -46,36 +58,122 @@ class PolicyManager(BaseManager):
         """
         Retrieve policy details by policy ID.
         """
-        policy = await self.redis.json().get(f"{self.prefix}:{policy_id}")
+        policy = await self.bounded(self.redis.json().get(f"{self.prefix}:{policy_id}"))
         if not policy:
             raise PolicyNotFound(f"Policy '{policy_id}' not found")
         return {"policy_id": policy_id, "conditions": policy}
 
+    async def get_policies(self, policy_ids: list) -> list:
+        """
+        Retrieve the details of several policies in a single round trip.
+
+        Policies deleted in the meantime are skipped.
+        """
+        if not policy_ids:
+            return []
+        keys = [f"{self.prefix}:{policy_id}" for policy_id in policy_ids]
+        results = await self.redis.json().mget(keys, ".")
+
+        return [
+            {"policy_id": policy_id, "conditions": conditions}
+            for policy_id, conditions in zip(policy_ids, results)
+            if conditions
+        ]
+
     async def get_policy_conditions(self, policy_id: str) -> list:
         """
         Retrieve the conditions of a policy by policy ID.
+
+        Concurrent lookups of the same policy share a single Redis call, so the
+        returned list must not be mutated.
+        """
+        _, conditions = await self.get_versioned_conditions(policy_id)
+        return conditions
+
+    async def get_versioned_conditions(
+        self, policy_id: str
+    ) -> Tuple[Optional[str], list]:
+        """
+        Retrieve the version stamp and the conditions of a policy by policy ID.
+
+        Concurrent lookups of the same policy share a single Redis call, so the
+        returned list must not be mutated.
+        """
+        return await self.single_flight.do(
+            policy_id, lambda: self.load_versioned_conditions(policy_id)
+        )
+
+    async def load_versioned_conditions(
+        self, policy_id: str
+    ) -> Tuple[Optional[str], list]:
         """
-        policy = await self.get_policy(policy_id)
-        return policy["conditions"]
+        Load the version stamp and the conditions of a policy in a single round
+        trip. The version is None for policies stored before versions existed.
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.json().get(f"{self.prefix}:{policy_id}")
+            pipe.hget(f"{self.prefix}_versions", policy_id)
+            conditions, version = await self.bounded(pipe.execute())
+        if not conditions:
+            raise PolicyNotFound(f"Policy '{policy_id}' not found")
+        return version, conditions
 
-    async def validate_policy_conditions(self, conditions: list) -> None:
+    async def watch_policy_conditions(self, pipe, conditions: list) -> None:
         """
-        Validate the conditions of a policy.
+        Validate the conditions of a policy, watching their attributes on a
+        transaction, so that a policy never uses an attribute deleted meanwhile.
         """
+        attribute_types = await self.watch_attributes(
+            pipe, {condition["attribute_name"] for condition in conditions}
+        )
         for condition in conditions:
-            attribute_type = await self.get_attribute_type(condition["attribute_name"])
             self.validate_condition(
                 condition["attribute_name"],
-                attribute_type,
+                attribute_types[condition["attribute_name"]],
                 condition["operator"],
                 condition["value"],
             )
 
-    async def create_new_policy(self, policy_id: str, conditions: list) -> None:
+    async def create_new_policy(
+        self, policy_id: str, conditions: list, previous_conditions: list = None
+    ) -> None:
         """
         Create a new policy with the given ID and conditions.
+
+        The conditions are validated and the attribute index is updated in a
+        transaction watching the attributes, based on the difference between
+        the previous and the new referenced attributes.
+        """
+
+        async def create(pipe) -> None:
+            await self.watch_policy_conditions(pipe, conditions)
+            pipe.multi()
+            self.set_policy(pipe, policy_id, conditions, previous_conditions)
+
+        await self.redis.transaction(create)
+
+    def set_policy(
+        self,
+        pipe,
+        policy_id: str,
+        conditions: list,
+        previous_conditions: list = None,
+    ) -> None:
         """
-        await self.redis.json().set(f"{self.prefix}:{policy_id}", ".", conditions)
+        Queue the write of a policy, its version stamp and its attribute index
+        entries on a pipeline.
+        """
+        attributes = {condition["attribute_name"] for condition in conditions}
+        previous_attributes = {
+            condition["attribute_name"] for condition in previous_conditions or []
+        }
+
+        pipe.json().set(f"{self.prefix}:{policy_id}", ".", conditions)
+        self.bump_version(pipe, policy_id)
+        for attribute_name in previous_attributes - attributes:
+            pipe.srem(f"{self.attribute_index_prefix}:{attribute_name}", policy_id)
+        for attribute_name in attributes - previous_attributes:
+            pipe.sadd(f"{self.attribute_index_prefix}:{attribute_name}", policy_id)
 
     def validate_condition(
         self, attribute_name: str, attribute_type: str, operator: str, value: Any
@@ -83,6 +181,13 @@ class PolicyManager(BaseManager):
         """
         Validate a single condition within a policy.
 
+        Allowed operators by attribute type:
+            integer: "=", "!=", "<", ">" with an integer, "in", "not_in" with a
+                non-empty list of integers, "between" with [low, high] (inclusive).
+            boolean: "=", "!=" with a boolean.
+            string: "=", "!=", "starts_with" with a string, "in", "not_in" with
+                a non-empty list of strings.
+
         Args:
             attribute_name (str): The name of the attribute in the condition.
             attribute_type (str): The type of the attribute.
@@ -94,38 +199,281 @@ class PolicyManager(BaseManager):
             InvalidAttributeType: If the attribute type is invalid.
         """
         if attribute_type == "integer":
-            if not isinstance(value, int) or operator not in ("=", ">", "<"):
-                raise InvalidPolicyConditions(
-                    f"Invalid condition for '{attribute_name}'"
-                )
+            value_type, operators = int, ("=", "!=", ">", "<")
         elif attribute_type == "boolean":
-            if not isinstance(value, bool) or operator != "=":
-                raise InvalidPolicyConditions(
-                    f"Invalid condition for '{attribute_name}'"
-                )
+            value_type, operators = bool, ("=", "!=")
         elif attribute_type == "string":
-            if not isinstance(value, str) or operator not in ("=", "starts_with"):
-                raise InvalidPolicyConditions(
-                    f"Invalid condition for '{attribute_name}'"
-                )
+            value_type, operators = str, ("=", "!=", "starts_with")
         else:
             raise InvalidAttributeType(f"Invalid attribute type: '{attribute_type}'")
 
-    async def get_attribute_type(self, attribute_name: str) -> str:
-        """
-        Retrieve the type of an attribute by attribute name.
-        """
-        attribute_type = await self.redis.get(f"attribute:{attribute_name}")
-        if not attribute_type:
-            raise AttributeNotFound(
-                f"Attribute '{attribute_name}' not found, create it first"
+        if operator in ("in", "not_in") and attribute_type != "boolean":
+            valid = (
+                isinstance(value, list)
+                and len(value) > 0
+                and all(type(member) == value_type for member in value)
+            )
+        elif operator == "between" and attribute_type == "integer":
+            valid = (
+                isinstance(value, list)
+                and len(value) == 2
+                and all(type(bound) == int for bound in value)
+                and value[0] <= value[1]
             )
-        return attribute_type
+        else:
+            valid = isinstance(value, value_type) and operator in operators
+
+        if not valid:
+            raise InvalidPolicyConditions(f"Invalid condition for '{attribute_name}'")
 
     async def update_policy_conditions(self, policy_id: str, conditions: list) -> list:
+        """
+        Update the conditions of a policy.
+
+        The effective policies of the resources using it are recomputed with
+        the new conditions and written in the same transaction, so decisions
+        never see a pruning based on the previous ones.
+        """
         conditions = [condition.model_dump() for condition in conditions]
 
         await self.get_policy(policy_id)
-        await self.validate_policy_conditions(conditions)
-        await self.create_new_policy(policy_id, conditions)
+
+        async def update(pipe) -> None:
+            await self.watch_policy_conditions(pipe, conditions)
+            previous_policy = await self.get_policy(policy_id)
+            previous_version = await self.redis.hget(
+                f"{self.prefix}_versions", policy_id
+            )
+            version = str(int(previous_version or 0) + 1)
+            resources = await self.watch_resources(
+                pipe, await self.get_policy_resources(policy_id)
+            )
+            effective = await self.watch_effective_policies(
+                pipe, resources, {policy_id: (version, conditions)}
+            )
+            pipe.multi()
+            self.set_policy(pipe, policy_id, conditions, previous_policy["conditions"])
+            for resource_id, resource_effective in effective.items():
+                self.set_effective_policies(pipe, resource_id, resource_effective)
+
+        await self.redis.transaction(
+            update,
+            f"{self.prefix}:{policy_id}",
+            f"{self.resource_index_prefix}:{policy_id}",
+        )
         return await self.get_policy(policy_id)
+
+    async def watch_resources(self, pipe, resource_ids: set) -> dict:
+        """
+        WATCH resources on a transaction and read their policy IDs.
+
+        Returns:
+            dict: The policy IDs of each resource, empty for missing resources.
+        """
+        resource_ids = list(resource_ids)
+        if not resource_ids:
+            return {}
+        keys = [f"resource:{resource_id}" for resource_id in resource_ids]
+        await pipe.watch(*keys)
+        async with self.redis.pipeline(transaction=False) as reads:
+            for key in keys:
+                reads.smembers(key)
+            results = await reads.execute()
+        return dict(zip(resource_ids, results))
+
+    async def watch_effective_policies(
+        self, pipe, resources: dict, changed: dict
+    ) -> dict:
+        """
+        Compute the policies to evaluate for resources, leaving out the ones
+        subsumed by others, which never change a decision.
+
+        The policies read are WATCHed on the transaction, so that it fails if
+        any of them changes before it is executed. Each effective policy is
+        stored with the version stamp it was pruned against ("0" for policies
+        stored before versions existed), so that a decision can tell when it
+        read the conditions of another version.
+
+        Args:
+            pipe: The transaction.
+            resources (dict): The policy IDs of each resource.
+            changed (dict): The version stamp and conditions of the policies
+                being written by the transaction, None for deleted ones, used
+                instead of reading them.
+
+        Returns:
+            dict: The effective policy IDs of each resource, with their versions.
+        """
+        policies = {}
+        policy_ids = list(set().union(*resources.values()) - set(changed))
+        if policy_ids:
+            await pipe.watch(
+                *[f"{self.prefix}:{policy_id}" for policy_id in policy_ids]
+            )
+            versions = await self.redis.hmget(f"{self.prefix}_versions", policy_ids)
+            versions = dict(zip(policy_ids, versions))
+            for policy in await self.get_policies(policy_ids):
+                policies[policy["policy_id"]] = (
+                    versions[policy["policy_id"]] or "0",
+                    policy["conditions"],
+                )
+        for policy_id, policy in changed.items():
+            if policy is not None:
+                policies[policy_id] = policy
+
+        effective = {}
+        for resource_id, policy_ids in resources.items():
+            kept = prune_policies(
+                {
+                    policy_id: policies[policy_id][1]
+                    for policy_id in policy_ids
+                    if policy_id in policies
+                }
+            )
+            effective[resource_id] = {
+                policy_id: policies[policy_id][0] for policy_id in kept
+            }
+        return effective
+
+    def set_effective_policies(self, pipe, resource_id: str, effective: dict) -> None:
+        """
+        Queue the replacement of the effective policies of a resource on a pipeline.
+        """
+        key = f"{self.effective_prefix}:{resource_id}"
+        pipe.delete(key)
+        if effective:
+            pipe.hset(key, mapping=effective)
+
+    async def refresh_effective_policies(self, resource_id: str) -> Tuple[set, dict]:
+        """
+        Recompute the effective policies of a resource, in a transaction
+        watching the resource and its policies.
+
+        Returns:
+            tuple: The policy IDs and the effective policy IDs of the resource.
+        """
+
+        async def refresh(pipe) -> Tuple[set, dict]:
+            resources = await self.watch_resources(pipe, [resource_id])
+            effective = await self.watch_effective_policies(pipe, resources, {})
+            pipe.multi()
+            self.set_effective_policies(pipe, resource_id, effective[resource_id])
+            return resources[resource_id], effective[resource_id]
+
+        return await self.redis.transaction(refresh, value_from_callable=True)
+
+    async def get_policy_resources(self, policy_id: str) -> set:
+        """
+        Retrieve the IDs of the resources using a policy.
+        """
+        return await self.redis.smembers(f"{self.resource_index_prefix}:{policy_id}")
+
+    async def rebuild_attribute_index(self, page_size: int = 1000) -> int:
+        """
+        Add every policy to the attribute index.
+
+        Policies stored before the index existed are missing from it, so the
+        attributes they use could be deleted from under them. Each page is
+        indexed in a transaction watching its policies, so the rebuild can run
+        while serving traffic, and be run again.
+
+        Returns:
+            int: The number of policies indexed.
+        """
+        indexed = 0
+        cursor = 0
+        while True:
+            async for cursor, policy_ids in self.scan_ids(cursor, page_size):
+                if policy_ids:
+                    indexed += await self.redis.transaction(
+                        lambda pipe: self.index_policies(pipe, policy_ids),
+                        *[f"{self.prefix}:{policy_id}" for policy_id in policy_ids],
+                        value_from_callable=True,
+                    )
+            if cursor == 0:
+                break
+        return indexed
+
+    async def index_policies(self, pipe, policy_ids: list) -> int:
+        """
+        Queue the addition of policies to the attribute index on a transaction.
+        """
+        policies = await self.get_policies(policy_ids)
+        pipe.multi()
+        for policy in policies:
+            for attribute_name in {
+                condition["attribute_name"] for condition in policy["conditions"]
+            }:
+                pipe.sadd(
+                    f"{self.attribute_index_prefix}:{attribute_name}",
+                    policy["policy_id"],
+                )
+        return len(policies)
+
+    async def get_attribute_policies(self, attribute_name: str) -> set:
+        """
+        Retrieve the IDs of the policies using an attribute.
+        """
+        return await self.redis.smembers(
+            f"{self.attribute_index_prefix}:{attribute_name}"
+        )
+
+    async def delete_policy(self, policy_id: str, cascade: bool = False) -> dict:
+        """
+        Delete a policy by policy ID.
+
+        Args:
+            policy_id (str): The ID of the policy.
+            cascade (bool): Detach the policy from the resources using it instead
+                of refusing the deletion. A resource left without policies is
+                removed, as Redis does not keep empty sets.
+
+        Raises:
+            PolicyNotFound: If the policy does not exist.
+            PolicyInUse: If the policy is attached to resources and cascade is False.
+        """
+
+        async def delete(pipe) -> set:
+            policy = await self.get_policy(policy_id)
+            resource_ids = await self.get_policy_resources(policy_id)
+            if resource_ids and not cascade:
+                raise PolicyInUse(
+                    f"Policy '{policy_id}' is used by {len(resource_ids)} resource(s)"
+                )
+
+            resources = await self.watch_resources(pipe, resource_ids)
+            for policy_ids in resources.values():
+                policy_ids.discard(policy_id)
+            effective = await self.watch_effective_policies(
+                pipe, resources, {policy_id: None}
+            )
+            attributes = {
+                condition["attribute_name"] for condition in policy["conditions"]
+            }
+
+            pipe.multi()
+            pipe.delete(
+                f"{self.prefix}:{policy_id}",
+                f"{self.resource_index_prefix}:{policy_id}",
+            )
+            for attribute_name in attributes:
+                pipe.srem(f"{self.attribute_index_prefix}:{attribute_name}", policy_id)
+            self.bump_version(pipe, policy_id)
+            for resource_id in resource_ids:
+                pipe.srem(f"resource:{resource_id}", policy_id)
+                self.set_effective_policies(pipe, resource_id, effective[resource_id])
+                self.bump_version(pipe, resource_id, "resource")
+            return resource_ids
+
+        resource_ids = await self.redis.transaction(
+            delete,
+            f"{self.prefix}:{policy_id}",
+            f"{self.resource_index_prefix}:{policy_id}",
+            value_from_callable=True,
+        )
+
+        return {
+            "policy_id": policy_id,
+            "deleted": True,
+            "detached_resources": sorted(resource_ids),
+        }
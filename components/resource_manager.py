@@ -1,5 +1,6 @@
 from components.base_manager import BaseManager
 from components.policy_manager import PolicyManager
+from components.single_flight import SingleFlight
 from exceptions import (
     ResourceAlreadyExists,
     InvalidResource,
@@ -15,10 +16,12 @@ class ResourceManager(BaseManager):
 
         This class manages resources, including creation and validation of policies.
 
-        Initializes the prefix for resource keys and an instance of PolicyManager.
+        Initializes the prefix for resource keys, an instance of PolicyManager
+        and the coalescing of concurrent policy lookups of the same resource.
         """
         super().__init__()
         self.prefix = "resource"
+        self.single_flight = SingleFlight()
         self.policy_manager = PolicyManager()
 
     async def create_resource(self, resource_id: str, policy_ids: List[str]) -> dict:
@@ -49,26 +52,183 @@ class ResourceManager(BaseManager):
     async def create_new_resource(self, resource_id: str, policy_ids: list) -> None:
         """
         Create a new resource with the given ID and associated policy IDs.
+
+        The resource set is replaced, the policy index is updated based on the
+        difference between the previous and the new policy IDs, and the pruned
+        set of effective policies is stored, all in the same transaction. It
+        watches the resource and the policies read, so that the effective
+        policies are never pruned against conditions that changed meanwhile.
         """
-        await self.redis.sadd(f"{self.prefix}:{resource_id}", *policy_ids)
+        policy_ids = set(policy_ids)
+        index_prefix = self.policy_manager.resource_index_prefix
+
+        async def create(pipe) -> None:
+            resources = await self.policy_manager.watch_resources(pipe, [resource_id])
+            previous_policy_ids = resources[resource_id]
+            effective = await self.policy_manager.watch_effective_policies(
+                pipe, {resource_id: policy_ids}, {}
+            )
+
+            pipe.multi()
+            pipe.delete(f"{self.prefix}:{resource_id}")
+            pipe.sadd(f"{self.prefix}:{resource_id}", *policy_ids)
+            self.policy_manager.set_effective_policies(
+                pipe, resource_id, effective[resource_id]
+            )
+            self.bump_version(pipe, resource_id)
+            for policy_id in previous_policy_ids - policy_ids:
+                pipe.srem(f"{index_prefix}:{policy_id}", resource_id)
+            for policy_id in policy_ids - previous_policy_ids:
+                pipe.sadd(f"{index_prefix}:{policy_id}", resource_id)
+
+        await self.redis.transaction(create)
 
     async def get_resource(self, resource_id: str) -> dict:
         """
         Retrieve resource details by resource ID.
         """
-        exists = await self.redis.exists(f"{self.prefix}:{resource_id}")
+        exists = await self.bounded(self.redis.exists(f"{self.prefix}:{resource_id}"))
         if not exists:
             raise ResourceNotFound(f"Resource '{resource_id}' not found")
-        policy_ids = await self.redis.smembers(f"{self.prefix}:{resource_id}")
+        policy_ids = await self.bounded(
+            self.redis.smembers(f"{self.prefix}:{resource_id}")
+        )
 
         return {"resource_id": resource_id, "policy_ids": policy_ids}
 
+    async def get_resources(self, resource_ids: list) -> list:
+        """
+        Retrieve the details of several resources in a single round trip.
+
+        Resources deleted in the meantime are skipped.
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for resource_id in resource_ids:
+                pipe.smembers(f"{self.prefix}:{resource_id}")
+            results = await pipe.execute()
+
+        return [
+            {"resource_id": resource_id, "policy_ids": sorted(policy_ids)}
+            for resource_id, policy_ids in zip(resource_ids, results)
+            if policy_ids
+        ]
+
     async def get_resource_policies(self, resource_id: str) -> dict:
         """
-        Retrieve the policy IDs associated with a resource by resource ID.
+        Retrieve the policy IDs to evaluate for a resource by resource ID, with
+        the version stamp each was pruned against, None if not pruned.
+
+        Concurrent lookups of the same resource share a single Redis call, so
+        the returned dict must not be mutated.
         """
+        return await self.single_flight.do(
+            resource_id, lambda: self.load_resource_policies(resource_id)
+        )
+
+    async def load_resource_policies(self, resource_id: str) -> dict:
+        """
+        Load the effective policies of a resource, falling back to all of its
+        policies for resources stored before effective policies existed.
+        """
+        effective = await self.bounded(
+            self.redis.hgetall(f"{self.policy_manager.effective_prefix}:{resource_id}")
+        )
+        if effective:
+            return effective
         resource = await self.get_resource(resource_id)
-        return resource["policy_ids"]
+        return dict.fromkeys(resource["policy_ids"])
+
+    async def get_resource_analysis(self, resource_id: str) -> dict:
+        """
+        Retrieve the effective policies of a resource and the number of policy
+        evaluations per decision they save.
+        """
+        resource = await self.get_resource(resource_id)
+        effective = await self.load_resource_policies(resource_id)
+        return {
+            "resource_id": resource_id,
+            "policy_ids": sorted(resource["policy_ids"]),
+            "effective_policy_ids": sorted(effective),
+            "evaluations_saved": len(resource["policy_ids"]) - len(effective),
+        }
+
+    async def prune_all_resources(self, page_size: int = 1000) -> dict:
+        """
+        Recompute the effective policies of every resource.
+
+        Returns:
+            dict: The number of resources, of policies and of effective policies,
+                and the average number of policy evaluations saved per decision.
+        """
+        resources = 0
+        policies = 0
+        effective_policies = 0
+        cursor = 0
+        while True:
+            async for cursor, resource_ids in self.scan_ids(cursor, page_size):
+                for resource_id in resource_ids:
+                    policy_ids, effective = (
+                        await self.policy_manager.refresh_effective_policies(
+                            resource_id
+                        )
+                    )
+                    if not policy_ids:
+                        continue
+                    resources += 1
+                    policies += len(policy_ids)
+                    effective_policies += len(effective)
+            if cursor == 0:
+                break
+
+        return {
+            "resources": resources,
+            "policies": policies,
+            "effective_policies": effective_policies,
+            "evaluations_saved_per_decision": (
+                (policies - effective_policies) / resources if resources else 0
+            ),
+        }
+
+    async def rebuild_policy_index(self, page_size: int = 1000) -> int:
+        """
+        Add every resource to the policy index.
+
+        Resources stored before the index existed are missing from it, so the
+        policies they use could be deleted from under them. Each page is
+        indexed in a transaction watching its resources, so the rebuild can run
+        while serving traffic, and be run again.
+
+        Returns:
+            int: The number of resources indexed.
+        """
+        indexed = 0
+        cursor = 0
+        while True:
+            async for cursor, resource_ids in self.scan_ids(cursor, page_size):
+                if resource_ids:
+                    indexed += await self.redis.transaction(
+                        lambda pipe: self.index_resources(pipe, resource_ids),
+                        *[
+                            f"{self.prefix}:{resource_id}"
+                            for resource_id in resource_ids
+                        ],
+                        value_from_callable=True,
+                    )
+            if cursor == 0:
+                break
+        return indexed
+
+    async def index_resources(self, pipe, resource_ids: list) -> int:
+        """
+        Queue the addition of resources to the policy index on a transaction.
+        """
+        resources = await self.get_resources(resource_ids)
+        index_prefix = self.policy_manager.resource_index_prefix
+        pipe.multi()
+        for resource in resources:
+            for policy_id in resource["policy_ids"]:
+                pipe.sadd(f"{index_prefix}:{policy_id}", resource["resource_id"])
+        return len(resources)
 
     async def update_resource_policies(
         self, resource_id: str, policy_ids: list
@@ -78,7 +238,33 @@ class ResourceManager(BaseManager):
         """
         await self.get_resource(resource_id)
         await self.validate_policies(policy_ids)
-        await self.redis.delete(f"{self.prefix}:{resource_id}")
         await self.create_new_resource(resource_id, policy_ids)
 
         return {"resource_id": resource_id, "policy_ids": policy_ids}
+
+    async def delete_resource(self, resource_id: str) -> dict:
+        """
+        Delete a resource by resource ID and remove it from the policy index.
+
+        The deletion runs in a transaction watching the resource, so that the
+        policies attached to it meanwhile are removed from the index as well.
+        """
+        index_prefix = self.policy_manager.resource_index_prefix
+
+        async def delete(pipe) -> None:
+            resources = await self.policy_manager.watch_resources(pipe, [resource_id])
+            if not resources[resource_id]:
+                raise ResourceNotFound(f"Resource '{resource_id}' not found")
+
+            pipe.multi()
+            pipe.delete(
+                f"{self.prefix}:{resource_id}",
+                f"{self.policy_manager.effective_prefix}:{resource_id}",
+            )
+            self.bump_version(pipe, resource_id)
+            for policy_id in resources[resource_id]:
+                pipe.srem(f"{index_prefix}:{policy_id}", resource_id)
+
+        await self.redis.transaction(delete)
+
+        return {"resource_id": resource_id, "deleted": True}
@@ -1,12 +1,23 @@
 from components.attribute_manager import AttributeManager
 from components.models.attribute_models import NewAttribute
-from exceptions import AttributeNotFound, AttributeAlreadyExists, AttributeWrongType
-from fastapi import APIRouter, HTTPException
+from exceptions import (
+    AttributeNotFound,
+    AttributeAlreadyExists,
+    AttributeWrongType,
+    AttributeInUse,
+)
+from components.routers.pagination import PageParams, stream_page
+from fastapi import APIRouter, Depends, HTTPException
 
 attribute_router = APIRouter(tags=["attributes"])
 attribute_manager = AttributeManager()
 
 
+@attribute_router.get("")
+async def list_attributes(page: PageParams = Depends()):
+    return stream_page(attribute_manager, attribute_manager.get_attributes, page)
+
+
 @attribute_router.get("/{name}")
 async def get_attribute(name: str):
     try:
@@ -24,3 +35,13 @@ async def create_attribute(new_attribute: NewAttribute):
         )
     except (AttributeAlreadyExists, AttributeWrongType) as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@attribute_router.delete("/{name}")
+async def delete_attribute(name: str, cascade: bool = False):
+    try:
+        return await attribute_manager.delete_attribute(name, cascade)
+    except AttributeNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except AttributeInUse as e:
+        raise HTTPException(status_code=400, detail=str(e))
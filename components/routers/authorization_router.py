@@ -1,15 +1,106 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
+from components.admission_controller import AdmissionController
 from components.authorization_manager import AuthorizationManager
-from exceptions import UserNotFound, ResourceNotFound
+from components.models.authorization_models import AuthorizationBatch, Evaluation
+from exceptions import (
+    UserNotFound,
+    ResourceNotFound,
+    PolicyNotFound,
+    AttributeNotFound,
+    InvalidAttributeType,
+    ServiceOverloaded,
+    DeadlineExceeded,
+)
 
 authorization_router = APIRouter(tags=["authorization"])
 authorization_manager = AuthorizationManager()
+admission_controller = AdmissionController()
+
+
+def overloaded(e: Exception) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(admission_controller.retry_after)},
+    )
 
 
 @authorization_router.get("")
 async def is_authorized(user_id: str, resource_id: str):
     try:
-        decision = await authorization_manager.is_authorized(user_id, resource_id)
+        async with admission_controller.admit():
+            decision = await authorization_manager.is_authorized(user_id, resource_id)
+        return {"allowed": decision}
+    except (UserNotFound, ResourceNotFound, PolicyNotFound) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (ServiceOverloaded, DeadlineExceeded) as e:
+        raise overloaded(e)
+
+
+async def batch_decision(user_id: str, resource_id: str) -> dict:
+    try:
+        return {
+            "allowed": await authorization_manager.is_authorized(user_id, resource_id)
+        }
+    except (UserNotFound, ResourceNotFound, PolicyNotFound) as e:
+        return {"error": str(e)}
+
+
+async def batch_decisions(queries: list) -> list:
+    """
+    Decide the queries of a batch, each admitted like a single query.
+
+    At most AUTHZ_MAX_CONCURRENCY workers share the queries, so that a batch
+    holds at most as many slots as that many single queries would, and never
+    floods the admission queue. The first overloaded or timed out query fails
+    the batch.
+    """
+    results = [None] * len(queries)
+    pending = iter(enumerate(queries))
+
+    async def worker() -> None:
+        for index, query in pending:
+            async with admission_controller.admit():
+                results[index] = await batch_decision(query.user_id, query.resource_id)
+
+    workers = [
+        asyncio.ensure_future(worker())
+        for _ in range(min(len(queries), admission_controller.max_concurrency))
+    ]
+    try:
+        await asyncio.gather(*workers)
+    finally:
+        for task in workers:
+            task.cancel()
+    return results
+
+
+@authorization_router.post("/batch")
+async def is_authorized_batch(batch: AuthorizationBatch):
+    try:
+        return {"results": await batch_decisions(batch.queries)}
+    except (ServiceOverloaded, DeadlineExceeded) as e:
+        raise overloaded(e)
+
+
+@authorization_router.post("/evaluate")
+async def evaluate(evaluation: Evaluation):
+    try:
+        async with admission_controller.admit():
+            decision = await authorization_manager.evaluate(
+                evaluation.resource_id,
+                evaluation.attributes,
+                evaluation.environment,
+                evaluation.user_id,
+            )
         return {"allowed": decision}
-    except (UserNotFound, ResourceNotFound) as e:
+    except (
+        ResourceNotFound,
+        PolicyNotFound,
+        AttributeNotFound,
+        InvalidAttributeType,
+    ) as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except (ServiceOverloaded, DeadlineExceeded) as e:
+        raise overloaded(e)
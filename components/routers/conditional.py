@@ -0,0 +1,41 @@
+from typing import Awaitable, Callable, Optional
+from components.base_manager import BaseManager
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """
+    Tell whether an ETag is listed in an If-None-Match header, using the weak
+    comparison required for GET requests.
+    """
+    if not if_none_match:
+        return False
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+async def conditional_get(
+    manager: BaseManager,
+    entity_id: str,
+    if_none_match: Optional[str],
+    load: Callable[[str], Awaitable[dict]],
+) -> Response:
+    """
+    Respond to a GET request with the entity and its version as ETag.
+
+    When If-None-Match lists the current version, a 304 is returned after the
+    version lookup alone, without loading the entity.
+    """
+    version = await manager.get_version(entity_id)
+    headers = None
+    if version is not None:
+        etag = f'"{version}"'
+        if etag_matches(etag, if_none_match):
+            return Response(status_code=304, headers={"ETag": etag})
+        headers = {"ETag": etag}
+
+    entity = await load(entity_id)
+    return JSONResponse(jsonable_encoder(entity), headers=headers)
@@ -0,0 +1,26 @@
+from components.routers.authorization_router import (
+    admission_controller,
+    authorization_manager,
+)
+from fastapi import APIRouter, Query
+
+metrics_router = APIRouter(tags=["metrics"])
+
+
+@metrics_router.get("")
+async def get_metrics():
+    return {
+        **authorization_manager.get_metrics(),
+        "admission": admission_controller.get_metrics(),
+    }
+
+
+@metrics_router.get("/hot_keys")
+async def get_hot_keys(limit: int = Query(10, ge=1, le=50)):
+    return authorization_manager.get_hot_keys(limit)
+
+
+@metrics_router.delete("/hot_keys")
+async def reset_hot_keys():
+    authorization_manager.reset_hot_keys()
+    return {"reset": True}
@@ -0,0 +1,49 @@
+import json
+from typing import Awaitable, Callable
+from components.base_manager import BaseManager
+from fastapi import Query
+from fastapi.responses import StreamingResponse
+
+
+class PageParams:
+    def __init__(
+        self,
+        cursor: int = Query(
+            0, ge=0, description="Cursor returned by the previous page"
+        ),
+        page_size: int = Query(100, ge=1, le=1000),
+        prefix: str = Query("", description="Only list IDs starting with this prefix"),
+    ):
+        self.cursor = cursor
+        self.page_size = page_size
+        self.prefix = prefix
+
+
+def stream_page(
+    manager: BaseManager,
+    load_many: Callable[[list], Awaitable[list]],
+    page: PageParams,
+) -> StreamingResponse:
+    """
+    Stream one page of entities as {"items": [...], "next_cursor": int}.
+
+    Entities are loaded and written out one SCAN batch at a time, so memory
+    stays bounded by the page size. A next_cursor of 0 means the listing is
+    complete.
+    """
+
+    async def body():
+        yield '{"items":['
+        separator = ""
+        next_cursor = 0
+        async for next_cursor, ids in manager.scan_ids(
+            page.cursor, page.page_size, page.prefix
+        ):
+            if not ids:
+                continue
+            for item in await load_many(ids):
+                yield separator + json.dumps(item)
+                separator = ","
+        yield f'],"next_cursor":{next_cursor}}}'
+
+    return StreamingResponse(body(), media_type="application/json")
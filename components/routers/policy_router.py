@@ -1,23 +1,33 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from components.models.policy_models import Policy, Condition
-from typing import List
+from typing import List, Optional
 from components.policy_manager import PolicyManager
+from components.routers.conditional import conditional_get
+from components.routers.pagination import PageParams, stream_page
 from exceptions import (
     PolicyAlreadyExists,
     InvalidPolicyConditions,
     AttributeNotFound,
     InvalidAttributeType,
     PolicyNotFound,
+    PolicyInUse,
 )
 
 policy_router = APIRouter(tags=["policies"])
 policy_manager = PolicyManager()
 
 
+@policy_router.get("")
+async def list_policies(page: PageParams = Depends()):
+    return stream_page(policy_manager, policy_manager.get_policies, page)
+
+
 @policy_router.get("/{policy_id}")
-async def get_policy(policy_id: str):
+async def get_policy(policy_id: str, if_none_match: Optional[str] = Header(None)):
     try:
-        return await policy_manager.get_policy(policy_id)
+        return await conditional_get(
+            policy_manager, policy_id, if_none_match, policy_manager.get_policy
+        )
     except PolicyNotFound as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -46,3 +56,11 @@ async def update_policy_conditions(policy_id: str, conditions: List[Condition]):
         InvalidAttributeType,
     ) as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@policy_router.delete("/{policy_id}")
+async def delete_policy(policy_id: str, cascade: bool = False):
+    try:
+        return await policy_manager.delete_policy(policy_id, cascade)
+    except (PolicyNotFound, PolicyInUse) as e:
+        raise HTTPException(status_code=400, detail=str(e))
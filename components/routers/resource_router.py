@@ -6,16 +6,34 @@ from exceptions import (
     InvalidResource,
     ResourceNotFound,
 )
-from fastapi import APIRouter, HTTPException
+from components.routers.conditional import conditional_get
+from components.routers.pagination import PageParams, stream_page
+from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Optional
 
 resource_router = APIRouter(tags=["resources"])
 resource_manager = ResourceManager()
 
 
+@resource_router.get("")
+async def list_resources(page: PageParams = Depends()):
+    return stream_page(resource_manager, resource_manager.get_resources, page)
+
+
 @resource_router.get("/{resource_id}")
-async def get_resource(resource_id: str):
+async def get_resource(resource_id: str, if_none_match: Optional[str] = Header(None)):
     try:
-        return await resource_manager.get_resource(resource_id)
+        return await conditional_get(
+            resource_manager, resource_id, if_none_match, resource_manager.get_resource
+        )
+    except ResourceNotFound as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@resource_router.get("/{resource_id}/effective_policies")
+async def get_resource_analysis(resource_id: str):
+    try:
+        return await resource_manager.get_resource_analysis(resource_id)
     except ResourceNotFound as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -38,3 +56,11 @@ async def update_resource_policies(resource_id: str, new_policy_ids: PolicyIDs):
         )
     except (ResourceNotFound, PolicyNotFound, InvalidResource) as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@resource_router.delete("/{resource_id}")
+async def delete_resource(resource_id: str):
+    try:
+        return await resource_manager.delete_resource(resource_id)
+    except ResourceNotFound as e:
+        raise HTTPException(status_code=400, detail=str(e))
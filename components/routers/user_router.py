@@ -8,17 +8,27 @@ from exceptions import (
     UserNotFound,
     UserHasNoAttribute,
 )
-from fastapi import APIRouter, HTTPException
+from components.routers.conditional import conditional_get
+from components.routers.pagination import PageParams, stream_page
+from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Optional
 
 
 user_router = APIRouter(tags=["users"])
 user_manager = UserManager()
 
 
+@user_router.get("")
+async def list_users(page: PageParams = Depends()):
+    return stream_page(user_manager, user_manager.get_users, page)
+
+
 @user_router.get("/{user_id}")
-async def get_user(user_id: str):
+async def get_user(user_id: str, if_none_match: Optional[str] = Header(None)):
     try:
-        return await user_manager.get_user(user_id)
+        return await conditional_get(
+            user_manager, user_id, if_none_match, user_manager.get_user
+        )
     except UserNotFound as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -0,0 +1,65 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    def __init__(self):
+        """
+        Initialize the SingleFlight.
+
+        This class coalesces concurrent identical calls: while a call for a key
+        is in flight, further calls for the same key wait for its result instead
+        of starting their own. Results are shared between the callers, so they
+        must not be mutated.
+
+        Attributes:
+            in_flight (dict): The in-flight task of each key.
+            leaders (int): The number of calls that started the work.
+            coalesced (int): The number of calls that shared an in-flight call.
+        """
+        self.in_flight = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable]) -> Any:
+        """
+        Run function for key, or join the call already in flight for it.
+
+        The work runs in its own task, so a cancelled caller does not cancel it
+        for the others. The task runs in the context of the caller that started
+        it, so its Redis calls are bounded by that caller's request deadline,
+        and the callers joining it are not bounded again.
+
+        Args:
+            key (Hashable): Identifies identical calls.
+            function (Callable[[], Awaitable]): Starts the work.
+
+        Returns:
+            Any: The result of the work, or raises its exception.
+        """
+        task = self.in_flight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(function())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def get_metrics(self) -> dict:
+        """
+        Get the leader and coalesced call counts.
+        """
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.in_flight),
+        }
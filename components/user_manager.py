@@ -1,5 +1,6 @@
 from components.base_manager import BaseManager
 from components.models.attribute_models import AttributeCollection
+from components.single_flight import SingleFlight
 from typing import Any
 from exceptions import (
     UserAlreadyExists,
@@ -17,17 +18,21 @@ class UserManager(BaseManager):
 
         This class manages users, including creation, updates, and attribute validation.
 
-        Initializes the prefix for user keys.
+        Initializes the prefix for user keys, the prefix of the reverse-reference
+        index:
+            attribute_users:{attribute_name} -> set of user IDs having the attribute
+        and the coalescing of concurrent attribute lookups of the same user.
         """
         super().__init__()
         self.prefix = "user"
+        self.attribute_index_prefix = "attribute_users"
+        self.single_flight = SingleFlight()
 
     async def create_user(self, user_id: str, attributes: AttributeCollection) -> dict:
         """
         Create a new user with the provided details.
         """
         await self.check_existing_user(user_id)
-        await self.validate_attributes(attributes)
         await self.create_new_user(user_id, attributes)
 
         return {"user_id": user_id, "attributes": attributes}
@@ -37,8 +42,6 @@ class UserManager(BaseManager):
         Update an existing user's attributes.
         """
         await self.get_user(user_id)
-        await self.validate_attributes(updated_attributes)
-        await self.delete_user(user_id)
         await self.create_new_user(user_id, updated_attributes)
 
         return {"user_id": user_id, "attributes": updated_attributes}
@@ -51,14 +54,13 @@ class UserManager(BaseManager):
         if existing_user:
             raise UserAlreadyExists(f"User '{user_id}' already exists")
 
-    async def validate_attributes(self, attributes: dict) -> None:
+    def validate_attributes(self, attribute_types: dict, attributes: dict) -> None:
         """
-        Validate user attributes.
+        Validate user attributes against the types of the attributes.
         """
         for attribute_name, attribute_value in attributes.items():
-            attribute_type = await self.get_attribute_type(attribute_name)
             self.validate_attribute_type(
-                attribute_name, attribute_type, attribute_value
+                attribute_name, attribute_types[attribute_name], attribute_value
             )
 
     async def get_attribute_type(self, attribute_name: str) -> str:
@@ -89,32 +91,146 @@ class UserManager(BaseManager):
 
     async def create_new_user(self, user_id: str, attributes: dict) -> None:
         """
-        Create a new user with the given attributes.
+        Create a new user with the given attributes, replacing previous ones.
+
+        The attributes are validated and the attribute index is updated, based
+        on the difference between the previous and the new attribute names, in
+        a transaction watching the user and the attributes, so that a user never
+        gets an attribute deleted meanwhile.
         """
-        await self.redis.hset(f"{self.prefix}:{user_id}", mapping=attributes)
+        key = f"{self.prefix}:{user_id}"
+
+        async def create(pipe) -> None:
+            previous_attributes = set(await self.redis.hkeys(key))
+            attribute_types = await self.watch_attributes(pipe, attributes)
+            self.validate_attributes(attribute_types, attributes)
+
+            pipe.multi()
+            pipe.delete(key)
+            pipe.hset(key, mapping=attributes)
+            self.bump_version(pipe, user_id)
+            for attribute_name in previous_attributes - set(attributes):
+                pipe.srem(f"{self.attribute_index_prefix}:{attribute_name}", user_id)
+            for attribute_name in set(attributes) - previous_attributes:
+                pipe.sadd(f"{self.attribute_index_prefix}:{attribute_name}", user_id)
+
+        await self.redis.transaction(create, key)
 
     async def delete_user(self, user_id: str) -> None:
         """
-        Delete an existing user by user ID.
+        Delete an existing user by user ID and remove it from the attribute index.
         """
-        await self.redis.delete(f"{self.prefix}:{user_id}")
+        key = f"{self.prefix}:{user_id}"
+
+        async def delete(pipe) -> None:
+            attribute_names = await self.redis.hkeys(key)
+            pipe.multi()
+            pipe.delete(key)
+            for attribute_name in attribute_names:
+                pipe.srem(f"{self.attribute_index_prefix}:{attribute_name}", user_id)
+
+        await self.redis.transaction(delete, key)
 
     async def get_user(self, user_id: str) -> dict:
         """
         Get user details by user ID.
         """
-        attributes = await self.redis.hgetall(f"{self.prefix}:{user_id}")
+        attributes = await self.bounded(self.redis.hgetall(f"{self.prefix}:{user_id}"))
         if not attributes:
             raise UserNotFound(f"User '{user_id}' could not be found")
         return {"user_id": user_id, "attributes": attributes}
 
+    async def get_users(self, user_ids: list) -> list:
+        """
+        Get the details of several users in a single round trip.
+
+        Users deleted in the meantime are skipped.
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for user_id in user_ids:
+                pipe.hgetall(f"{self.prefix}:{user_id}")
+            results = await pipe.execute()
+
+        return [
+            {"user_id": user_id, "attributes": attributes}
+            for user_id, attributes in zip(user_ids, results)
+            if attributes
+        ]
+
     async def get_user_attributes(self, user_id: str) -> dict:
         """
         Get a user's attributes by user ID.
+
+        Concurrent lookups of the same user share a single Redis call, so the
+        returned dict must not be mutated.
         """
-        user = await self.get_user(user_id)
+        user = await self.single_flight.do(user_id, lambda: self.get_user(user_id))
         return user["attributes"]
 
+    async def get_attribute_users(self, attribute_name: str) -> set:
+        """
+        Retrieve the IDs of the users having an attribute.
+        """
+        return await self.redis.smembers(
+            f"{self.attribute_index_prefix}:{attribute_name}"
+        )
+
+    def remove_attribute(self, pipe, attribute_name: str, user_ids: set) -> None:
+        """
+        Queue the removal of an attribute from users on a pipeline.
+
+        A user left without attributes is removed, as Redis does not keep
+        empty hashes.
+        """
+        for user_id in user_ids:
+            pipe.hdel(f"{self.prefix}:{user_id}", attribute_name)
+            self.bump_version(pipe, user_id)
+        pipe.delete(f"{self.attribute_index_prefix}:{attribute_name}")
+
+    async def rebuild_attribute_index(self, page_size: int = 1000) -> int:
+        """
+        Add every user to the attribute index.
+
+        Users stored before the index existed are missing from it, so deleting
+        an attribute would leave its values on them. Each page is indexed in a
+        transaction watching its users, so the rebuild can run while serving
+        traffic, and be run again.
+
+        Returns:
+            int: The number of users indexed.
+        """
+        indexed = 0
+        cursor = 0
+        while True:
+            async for cursor, user_ids in self.scan_ids(cursor, page_size):
+                if user_ids:
+                    indexed += await self.redis.transaction(
+                        lambda pipe: self.index_users(pipe, user_ids),
+                        *[f"{self.prefix}:{user_id}" for user_id in user_ids],
+                        value_from_callable=True,
+                    )
+            if cursor == 0:
+                break
+        return indexed
+
+    async def index_users(self, pipe, user_ids: list) -> int:
+        """
+        Queue the addition of users to the attribute index on a transaction.
+        """
+        async with self.redis.pipeline(transaction=False) as reads:
+            for user_id in user_ids:
+                reads.hkeys(f"{self.prefix}:{user_id}")
+            results = await reads.execute()
+
+        pipe.multi()
+        indexed = 0
+        for user_id, attribute_names in zip(user_ids, results):
+            if attribute_names:
+                indexed += 1
+            for attribute_name in attribute_names:
+                pipe.sadd(f"{self.attribute_index_prefix}:{attribute_name}", user_id)
+        return indexed
+
     async def get_user_attribute(self, user_id: str, attribute_name: str) -> Any:
         """
         Get a specific attribute of a user by user ID and attribute name.
@@ -135,14 +251,20 @@ class UserManager(BaseManager):
         Update a specific attribute of a user.
         """
         await self.get_user(user_id)
-        attribute_type = await self.get_attribute_type(attribute_name)
-        self.validate_attribute_type(attribute_name, attribute_type, attribute_value)
 
-        await self.get_user_attribute(user_id, attribute_name)
+        async def update(pipe) -> None:
+            attribute_types = await self.watch_attributes(pipe, [attribute_name])
+            self.validate_attribute_type(
+                attribute_name, attribute_types[attribute_name], attribute_value
+            )
+            await self.get_user_attribute(user_id, attribute_name)
 
-        await self.redis.hset(
-            f"{self.prefix}:{user_id}", attribute_name, attribute_value
-        )
+            pipe.multi()
+            pipe.hset(f"{self.prefix}:{user_id}", attribute_name, attribute_value)
+            pipe.sadd(f"{self.attribute_index_prefix}:{attribute_name}", user_id)
+            self.bump_version(pipe, user_id)
+
+        await self.redis.transaction(update, f"{self.prefix}:{user_id}")
 
         return {
             "user_id": user_id,
@@ -158,7 +280,11 @@ class UserManager(BaseManager):
         await self.get_attribute_type(attribute_name)
         await self.get_user_attribute(user_id, attribute_name)
 
-        await self.redis.hdel(f"{self.prefix}:{user_id}", attribute_name)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hdel(f"{self.prefix}:{user_id}", attribute_name)
+            pipe.srem(f"{self.attribute_index_prefix}:{attribute_name}", user_id)
+            self.bump_version(pipe, user_id)
+            await pipe.execute()
 
         return {
             "user_id": user_id,
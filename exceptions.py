@@ -61,3 +61,23 @@ class InvalidResource(Exception):
 class ResourceNotFound(Exception):
     def __init__(self, message):
         super().__init__(message)
+
+
+class AttributeInUse(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class PolicyInUse(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class ServiceOverloaded(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+
+class DeadlineExceeded(Exception):
+    def __init__(self, message):
+        super().__init__(message)
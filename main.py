@@ -5,7 +5,11 @@ from components.routers.attribute_router import attribute_router
 from components.routers.user_router import user_router
 from components.routers.policy_router import policy_router
 from components.routers.resource_router import resource_router
-from components.routers.authorization_router import authorization_router
+from components.routers.authorization_router import (
+    authorization_router,
+    authorization_manager as authorization_router_manager,
+)
+from components.routers.metrics_router import metrics_router
 from components.authorization_manager import AuthorizationManager
 
 
@@ -14,7 +18,9 @@ async def lifespan(app: FastAPI):
     # Check for database connection
     authorization_manager = AuthorizationManager()
     await authorization_manager.redis.ping()
+    authorization_router_manager.audit_logger.start()
     yield
+    await authorization_router_manager.audit_logger.stop()
     await authorization_manager.redis.close()
 
 
@@ -27,6 +33,7 @@ app.include_router(resource_router, prefix="/resources", tags=["resources"])
 app.include_router(
     authorization_router, prefix="/is_authorized", tags=["authorization"]
 )
+app.include_router(metrics_router, prefix="/metrics", tags=["metrics"])
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,68 @@
+from components.condition_matcher import compile_condition, compile_policy
+
+
+def condition(attribute_name: str, operator: str, value) -> dict:
+    return {"attribute_name": attribute_name, "operator": operator, "value": value}
+
+
+def test_integer_comparisons_convert_stored_strings():
+    assert compile_condition(condition("age", ">", 17))({"age": "18"})
+    assert not compile_condition(condition("age", ">", 17))({"age": "17"})
+    assert compile_condition(condition("age", "<", 18))({"age": "17"})
+    assert compile_condition(condition("age", "=", 30))({"age": "30"})
+    assert compile_condition(condition("age", "!=", 30))({"age": "31"})
+
+
+def test_between_is_inclusive():
+    matcher = compile_condition(condition("age", "between", [18, 65]))
+    assert matcher({"age": "18"})
+    assert matcher({"age": "65"})
+    assert not matcher({"age": "17"})
+    assert not matcher({"age": "66"})
+
+
+def test_set_operators():
+    ages = compile_condition(condition("age", "in", [1, 2]))
+    assert ages({"age": "2"})
+    assert not ages({"age": "3"})
+    departments = compile_condition(condition("dept", "not_in", ["hr", "legal"]))
+    assert departments({"dept": "sales"})
+    assert not departments({"dept": "hr"})
+
+
+def test_string_operators():
+    assert compile_condition(condition("email", "starts_with", "ad"))({"email": "ada"})
+    assert not compile_condition(condition("email", "starts_with", "ad"))(
+        {"email": "bob"}
+    )
+    assert compile_condition(condition("dept", "=", "sales"))({"dept": "sales"})
+    assert compile_condition(condition("dept", "!=", "sales"))({"dept": "hr"})
+
+
+def test_booleans_are_stored_as_integers():
+    assert compile_condition(condition("admin", "=", True))({"admin": "1"})
+    assert compile_condition(condition("admin", "=", False))({"admin": "0"})
+    assert compile_condition(condition("admin", "!=", True))({"admin": "0"})
+
+
+def test_missing_attribute_never_matches():
+    for operator, value in [("=", 1), ("!=", 1), ("not_in", [1]), ("<", 5)]:
+        assert not compile_condition(condition("age", operator, value))({})
+
+
+def test_unknown_operator_never_matches():
+    assert not compile_condition(condition("age", "~", 1))({"age": "1"})
+
+
+def test_policy_matches_when_all_conditions_do():
+    matcher = compile_policy(
+        [condition("age", ">", 17), condition("dept", "in", ["sales", "hr"])]
+    )
+    assert matcher({"age": "30", "dept": "hr"})
+    assert not matcher({"age": "30", "dept": "legal"})
+    assert not matcher({"age": "10", "dept": "hr"})
+    assert not matcher({"dept": "hr"})
+
+
+def test_policy_without_conditions_matches_everyone():
+    assert compile_policy([])({})
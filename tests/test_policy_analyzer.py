@@ -0,0 +1,162 @@
+from components.policy_analyzer import (
+    MAX_ENUMERATED_RANGE,
+    condition_domain,
+    domain_contains,
+    prune_policies,
+    subsumes,
+)
+
+
+def condition(attribute_name: str, operator: str, value) -> dict:
+    return {"attribute_name": attribute_name, "operator": operator, "value": value}
+
+
+def test_condition_domain_of_integers():
+    assert condition_domain(condition("age", "<", 18)) == (
+        "integer",
+        "range",
+        (None, 17),
+    )
+    assert condition_domain(condition("age", ">", 18)) == (
+        "integer",
+        "range",
+        (19, None),
+    )
+    assert condition_domain(condition("age", "between", [18, 65])) == (
+        "integer",
+        "range",
+        (18, 65),
+    )
+    assert condition_domain(condition("age", "!=", 3)) == (
+        "integer",
+        "not_set",
+        frozenset([3]),
+    )
+
+
+def test_condition_domain_of_booleans_and_strings():
+    assert condition_domain(condition("admin", "!=", True)) == (
+        "boolean",
+        "set",
+        frozenset([False]),
+    )
+    assert condition_domain(condition("email", "starts_with", "ad")) == (
+        "string",
+        "prefix",
+        "ad",
+    )
+    assert condition_domain(condition("dept", "in", ["hr", "it"])) == (
+        "string",
+        "set",
+        frozenset(["hr", "it"]),
+    )
+
+
+def test_condition_domain_not_understood():
+    assert condition_domain(condition("admin", "<", True)) is None
+    assert condition_domain(condition("age", "~", 1)) is None
+    assert condition_domain(condition("age", "in", [])) is None
+
+
+def test_not_set_contains_disjoint_range():
+    not_five = ("integer", "not_set", frozenset([5]))
+    assert domain_contains(not_five, ("integer", "range", (10, None)))
+    assert domain_contains(not_five, ("integer", "range", (None, 4)))
+    assert not domain_contains(not_five, ("integer", "range", (None, 20)))
+    assert not domain_contains(not_five, ("integer", "range", (5, 5)))
+
+
+def test_not_set_contains_disjoint_prefix():
+    not_hr = ("string", "not_set", frozenset(["hr"]))
+    assert domain_contains(not_hr, ("string", "prefix", "sa"))
+    assert not domain_contains(not_hr, ("string", "prefix", "h"))
+
+
+def test_not_set_contains_larger_not_set():
+    assert domain_contains(
+        ("integer", "not_set", frozenset([1])),
+        ("integer", "not_set", frozenset([1, 2])),
+    )
+    assert not domain_contains(
+        ("integer", "not_set", frozenset([1, 2])),
+        ("integer", "not_set", frozenset([1])),
+    )
+
+
+def test_set_contains_finite_range():
+    small = ("integer", "set", frozenset([1, 2, 3]))
+    assert domain_contains(small, ("integer", "range", (1, 3)))
+    assert not domain_contains(small, ("integer", "range", (1, 4)))
+    assert not domain_contains(small, ("integer", "range", (1, None)))
+
+
+def test_set_does_not_enumerate_large_ranges():
+    everything = ("integer", "set", frozenset(range(2 * MAX_ENUMERATED_RANGE)))
+    assert domain_contains(everything, ("integer", "range", (0, 10)))
+    assert not domain_contains(
+        everything, ("integer", "range", (0, MAX_ENUMERATED_RANGE))
+    )
+
+
+def test_range_and_prefix_containment():
+    adults = ("integer", "range", (18, None))
+    assert domain_contains(adults, ("integer", "range", (30, 40)))
+    assert domain_contains(adults, ("integer", "set", frozenset([20, 30])))
+    assert not domain_contains(adults, ("integer", "range", (None, 40)))
+    assert domain_contains(("string", "prefix", "ad"), ("string", "prefix", "adm"))
+    assert not domain_contains(("string", "prefix", "adm"), ("string", "prefix", "ad"))
+
+
+def test_domains_of_different_families_are_disjoint():
+    assert not domain_contains(
+        ("integer", "not_set", frozenset([1])), ("string", "set", frozenset(["a"]))
+    )
+
+
+def test_subsumes_requires_the_same_attribute():
+    assert subsumes([condition("age", ">", 18)], [condition("age", ">", 30)])
+    assert not subsumes([condition("age", ">", 18)], [condition("height", ">", 30)])
+
+
+def test_subsumes_with_extra_specific_conditions():
+    general = [condition("age", ">", 18)]
+    specific = [condition("age", ">", 30), condition("dept", "=", "sales")]
+    assert subsumes(general, specific)
+    assert not subsumes(specific, general)
+
+
+def test_missing_attribute_is_never_implied():
+    assert not subsumes([condition("age", "!=", 5)], [])
+    assert subsumes([condition("age", "!=", 5)], [condition("age", ">", 10)])
+
+
+def test_unknown_conditions_are_never_subsumed():
+    assert not subsumes([condition("age", "~", 1)], [condition("age", "~", 1)])
+    assert not subsumes([condition("age", ">", 1)], [condition("age", "~", 1)])
+
+
+def test_prune_keeps_the_most_general_policies():
+    policies = {
+        "adults": [condition("age", ">", 18)],
+        "seniors": [condition("age", ">", 65)],
+        "senior_sales": [condition("age", ">", 65), condition("dept", "=", "sales")],
+        "hr": [condition("dept", "=", "hr")],
+    }
+    assert prune_policies(policies) == {"adults", "hr"}
+
+
+def test_prune_keeps_one_of_identical_policies():
+    policies = {
+        "a": [condition("age", ">", 18)],
+        "b": [condition("age", ">", 18)],
+    }
+    assert len(prune_policies(policies)) == 1
+
+
+def test_prune_keeps_unrelated_policies():
+    policies = {
+        "adults": [condition("age", ">", 18)],
+        "minors": [condition("age", "<", 18)],
+    }
+    assert prune_policies(policies) == {"adults", "minors"}
+    assert prune_policies({}) == set()